@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+# Cerberus Magic Mirror - Benchmark Suite
+# Author: Sudeepa Wanigarathna
+
+"""
+Drive each mode over a fixed clip at several resolutions and report
+FPS, frame-time percentiles and peak memory as JSON.
+
+Examples:
+    python3 benchmark.py                                  # all modes, 480p/720p/1080p
+    python3 benchmark.py --modes cloak ghost --resolutions 720p
+    python3 benchmark.py --input clip.avi --output run.json
+    python3 benchmark.py --baseline last_release.json     # flag regressions
+"""
+
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import cv2
+import numpy as np
+import config
+
+RESOLUTIONS = {
+    '480p': (640, 480),
+    '720p': (1280, 720),
+    '1080p': (1920, 1080),
+}
+
+MODES = ['cloak', 'paint_object', 'paint_finger', 'ghost']
+
+def get_peak_rss_mb():
+    """Peak resident set size of this process in MB."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def percentile(values, q):
+    """Percentile in milliseconds of a list of durations in seconds."""
+    return float(np.percentile(values, q) * 1000) if values else None
+
+def create_mode(name):
+    """
+    Build a mode for benchmarking.
+
+    Returns:
+        tuple: (mode, reason) where mode is None and reason explains a skip
+    """
+    if name == 'cloak':
+        from modes.cloak_mode import CloakMode
+        return CloakMode(), None
+    if name == 'ghost':
+        from modes.ghost_mode import GhostMode
+        return GhostMode(), None
+
+    from modes.air_draw_mode import ARPaintMode, HAS_MEDIAPIPE
+    mode = ARPaintMode()
+    if name == 'paint_finger':
+        if not HAS_MEDIAPIPE:
+            return None, "MediaPipe not installed"
+        mode.tracking_mode = 'finger'
+    else:
+        mode.tracking_mode = 'object'
+    return mode, None
+
+def open_clip(input_path, width, height, seed):
+    """Open the benchmark clip, scaled to the requested resolution."""
+    from utils.frame_source import create_frame_source
+
+    if input_path:
+        kind = 'images' if os.path.isdir(input_path) else 'video'
+        return create_frame_source(kind, input_path, realtime=False, loop=True)
+    return create_frame_source('synthetic', realtime=False, loop=True,
+                               width=width, height=height, num_frames=0, seed=seed)
+
+def read_frame(source, width, height):
+    """Read one frame at the benchmark resolution."""
+    ret, frame = source.read()
+    if not ret:
+        raise RuntimeError("Benchmark clip produced no frames")
+    if frame.shape[1] != width or frame.shape[0] != height:
+        frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+    return frame
+
+def run_case(mode_name, resolution, frames, warmup, input_path, seed, stages=False, classifier=None,
+             mask_scale=None, mask_upsample=None, workers=None):
+    """
+    Benchmark one mode at one resolution.
+
+    Setup (background capture for the cloak) and warm-up frames are not
+    timed; only process_frame calls are measured, never frame decoding.
+
+    Returns:
+        dict: Result record for the JSON report
+    """
+    # Mode status messages must not end up in the JSON on stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        return _run_case(mode_name, resolution, frames, warmup, input_path, seed, stages, classifier,
+                         mask_scale, mask_upsample, workers)
+
+def _run_case(mode_name, resolution, frames, warmup, input_path, seed, stages, classifier,
+              mask_scale, mask_upsample, workers):
+    from utils.profiler import profiler
+
+    if classifier:
+        config.CLOAK_COLOR_CLASSIFIER = classifier
+        config.DRAW_COLOR_CLASSIFIER = classifier
+    if mask_scale:
+        config.CLOAK_MASK_SCALE = mask_scale
+    if mask_upsample:
+        config.CLOAK_MASK_UPSAMPLE = mask_upsample
+    if workers:
+        from utils.parallel import strip_executor
+        strip_executor.shutdown()
+        strip_executor.workers = workers
+
+    width, height = RESOLUTIONS[resolution]
+    record = {'mode': mode_name, 'resolution': resolution, 'width': width, 'height': height}
+
+    source = open_clip(input_path, width, height, seed)
+    record['baseline_rss_mb'] = get_peak_rss_mb()
+
+    mode, skip_reason = create_mode(mode_name)
+    if mode is None:
+        record['status'] = 'skipped'
+        record['reason'] = skip_reason
+        return record
+
+    # Cloak: capture the background from the clip's empty leading frames
+    if mode_name == 'cloak':
+        mode.handle_input(ord('b'))
+        while mode.is_capturing_background:
+            mode.process_frame(read_frame(source, width, height))
+        mode.calibration_mode = False
+
+    for _ in range(warmup):
+        mode.process_frame(read_frame(source, width, height))
+
+    profiler.reset()
+    profiler.set_enabled(stages)
+    durations = []
+    for _ in range(frames):
+        frame = read_frame(source, width, height)
+        start = time.perf_counter()
+        mode.process_frame(frame)
+        durations.append(time.perf_counter() - start)
+    source.release()
+    mode.close()
+
+    total = sum(durations)
+    record.update({
+        'status': 'ok',
+        'frames': len(durations),
+        'fps': len(durations) / total if total > 0 else None,
+        'mean_ms': total / len(durations) * 1000,
+        'p50_ms': percentile(durations, 50),
+        'p95_ms': percentile(durations, 95),
+        'p99_ms': percentile(durations, 99),
+        'max_ms': max(durations) * 1000,
+        'peak_rss_mb': get_peak_rss_mb(),
+    })
+    if mode_name == 'paint_finger':
+        # With asynchronous tracking, frame times exclude inference
+        record['hand_tracking'] = mode.hand_tracker.get_stats()
+    if stages:
+        record['stages'] = {name: {'mean_ms': mean, 'p50_ms': p50, 'p95_ms': p95, 'max_ms': peak}
+                            for name, mean, p50, p95, peak in profiler.get_summary()}
+    return record
+
+def run_isolated(*case_args):
+    """Run a case in a fresh process so peak RSS belongs to that case alone."""
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(run_case, *case_args).result()
+
+def get_environment():
+    """Describe the machine and library versions for the report."""
+    return {
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'python': platform.python_version(),
+        'opencv': cv2.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+def compare_to_baseline(results, baseline, tolerance):
+    """
+    Print per-case changes against a previous report.
+
+    Returns:
+        list: Descriptions of cases that regressed beyond the tolerance
+    """
+    previous = {(r['mode'], r['resolution']): r for r in baseline.get('results', []) if r.get('status') == 'ok'}
+    regressions = []
+
+    print("\nComparison with baseline:", file=sys.stderr)
+    for record in results:
+        old = previous.get((record['mode'], record['resolution']))
+        if record.get('status') != 'ok' or old is None:
+            continue
+
+        fps_change = (record['fps'] - old['fps']) / old['fps'] * 100
+        p95_change = (record['p95_ms'] - old['p95_ms']) / old['p95_ms'] * 100
+        flag = ""
+        if fps_change < -tolerance or p95_change > tolerance:
+            flag = "  <-- REGRESSION"
+            regressions.append(f"{record['mode']} @ {record['resolution']}")
+        print(f"  {record['mode']:<13} {record['resolution']:>5}: "
+              f"FPS {old['fps']:7.1f} -> {record['fps']:7.1f} ({fps_change:+.1f}%), "
+              f"p95 {old['p95_ms']:6.1f} -> {record['p95_ms']:6.1f} ms ({p95_change:+.1f}%){flag}",
+              file=sys.stderr)
+    return regressions
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Cerberus Magic Mirror benchmark suite")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    parser.add_argument("--resolutions", nargs="+", choices=list(RESOLUTIONS), default=list(RESOLUTIONS))
+    parser.add_argument("--frames", type=int, default=150, help="Timed frames per case")
+    parser.add_argument("--warmup", type=int, default=10, help="Untimed frames before measuring")
+    parser.add_argument("--input", help="Fixed clip (video file or image directory); default: synthetic")
+    parser.add_argument("--seed", type=int, default=config.SYNTHETIC_SEED, help="Synthetic clip seed")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="Previous JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=10.0,
+                        help="Allowed FPS drop / p95 increase in percent before flagging a regression")
+    parser.add_argument("--stages", action="store_true",
+                        help="Include per-stage timings from the stage profiler in the report")
+    parser.add_argument("--color-classifier", choices=["hsv", "lut"],
+                        help="Override how cloak/paint colour masks are computed (default: config)")
+    parser.add_argument("--cloak-mask-scale", type=int, choices=[1, 2, 4],
+                        help="Override the cloak mask resolution divisor (default: config)")
+    parser.add_argument("--cloak-mask-upsample", choices=["guided", "linear"],
+                        help="Override how a reduced-resolution cloak mask is upsampled (default: config)")
+    parser.add_argument("--workers", type=int,
+                        help="Strip-parallel worker count (default: config, one per CPU core)")
+    parser.add_argument("--no-isolate", action="store_true",
+                        help="Run all cases in this process (faster, but peak RSS is cumulative)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    results = []
+    for resolution in args.resolutions:
+        for mode_name in args.modes:
+            case_args = (mode_name, resolution, args.frames, args.warmup, args.input, args.seed,
+                         args.stages, args.color_classifier, args.cloak_mask_scale, args.cloak_mask_upsample,
+                         args.workers)
+            record = run_case(*case_args) if args.no_isolate else run_isolated(*case_args)
+            results.append(record)
+
+            if record['status'] == 'ok':
+                print(f"{mode_name:<13} {resolution:>5}: {record['fps']:7.1f} FPS  "
+                      f"p50 {record['p50_ms']:6.1f}  p95 {record['p95_ms']:6.1f}  "
+                      f"p99 {record['p99_ms']:6.1f} ms  peak RSS {record['peak_rss_mb']:.0f} MB",
+                      file=sys.stderr)
+            else:
+                print(f"{mode_name:<13} {resolution:>5}: skipped ({record['reason']})", file=sys.stderr)
+
+    report = {
+        'environment': get_environment(),
+        'settings': {'frames': args.frames, 'warmup': args.warmup,
+                     'input': args.input or 'synthetic', 'seed': args.seed, 'stages': args.stages,
+                     'color_classifier': args.color_classifier or 'config',
+                     'cloak_mask_scale': args.cloak_mask_scale or config.CLOAK_MASK_SCALE,
+                     'cloak_mask_upsample': args.cloak_mask_upsample or config.CLOAK_MASK_UPSAMPLE,
+                     'workers': args.workers or config.PARALLEL_WORKERS or os.cpu_count()},
+        'results': results,
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ Regressions: {', '.join(regressions)}", file=sys.stderr)
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -20,6 +20,25 @@ CAMERA_HEIGHT = 480  # 480p
 # Frame Rate
 CAMERA_FPS = 30  # Frames per second (15, 30, 60)
 
+# Frame Source
+# camera    - live webcam (CAMERA_INDEX)
+# video     - replay a video file (FRAME_SOURCE_PATH)
+# images    - numbered image sequence (directory or glob in FRAME_SOURCE_PATH)
+# synthetic - deterministic generated footage, no hardware needed
+FRAME_SOURCE = "camera"
+FRAME_SOURCE_PATH = None
+FRAME_SOURCE_REALTIME = True  # False = replay recorded input as fast as possible
+FRAME_SOURCE_LOOP = False  # Restart recorded input when it ends
+
+# Synthetic Source
+SYNTHETIC_FRAMES = 300  # 0 = endless
+SYNTHETIC_SEED = 0
+SYNTHETIC_EMPTY_FRAMES = 40  # Leading frames without cloak/marker (background capture)
+
+# Threaded Capture
+CAPTURE_BUFFER_SIZE = 2  # Ring buffer slots; the newest frame is always used
+CAPTURE_READ_TIMEOUT = 2.0  # Seconds to wait for a frame before giving up
+
 # ============================================================================
 # COLOR DETECTION SETTINGS (HSV Color Space)
 # ============================================================================
@@ -31,6 +50,14 @@ CLOAK_UPPER_RED1 = [10, 255, 255]
 CLOAK_LOWER_RED2 = [170, 120, 70]
 CLOAK_UPPER_RED2 = [180, 255, 255]
 
+# How masks are computed from these ranges: "hsv" (cvtColor + inRange per
+# frame) or "lut" (one lookup in a BGR table built when the ranges change).
+# The table replaces both red ranges with one pass; for a single range
+# OpenCV's HSV conversion is usually faster (compare with benchmark.py
+# --color-classifier).
+CLOAK_COLOR_CLASSIFIER = "lut"
+DRAW_COLOR_CLASSIFIER = "hsv"
+
 # Air Drawing Mode - Blue Color Detection
 DRAW_LOWER_BLUE = [100, 60, 60]
 DRAW_UPPER_BLUE = [140, 255, 255]
@@ -46,11 +73,23 @@ DRAW_UPPER_SKIN = [20, 255, 255]
 # Drawing Parameters
 DRAW_COLOR = (0, 255, 255)  # BGR: Yellow
 DRAW_THICKNESS = 5  # Line thickness in pixels
-DRAW_MAX_POINTS = 512  # Maximum points to remember
 
 # Detection Threshold
 DRAW_MIN_RADIUS = 10  # Minimum object radius to detect (in pixels)
 
+# Finger tracking: MediaPipe Hands runs on a background thread on the
+# newest frame, and rendering uses the latest landmarks extrapolated to
+# the current frame time. False runs the model inside each frame instead.
+HAND_TRACKING_ASYNC = True
+HAND_TRACKING_MAX_EXTRAPOLATION = 0.1  # Never extrapolate further ahead than this (seconds)
+HAND_TRACKING_MAX_AGE = 0.5  # Older landmarks count as hand lost (seconds)
+
+# Hand model input: the whole frame (cropping around the hand breaks the
+# model's own tracking). Frames larger than 720p are downscaled before the
+# RGB conversion; at 720p and below that saves nothing measurable.
+HAND_TRACKING_DOWNSCALE_ABOVE = 1280  # Longest frame side above which to downscale (pixels)
+HAND_TRACKING_INPUT_SIZE = 480  # Longest side of a downscaled model input (pixels)
+
 # ============================================================================
 # GHOST TRAIL SETTINGS
 # ============================================================================
@@ -75,16 +114,31 @@ SNAPSHOT_DIR = "snapshots"
 RECORDING_DIR = "recordings"
 LOG_DIR = "logs"
 ASSETS_DIR = "assets"
+COLOR_LUT_CACHE_DIR = "cache/color_luts"  # Colour lookup tables per calibration
+COLOR_LUT_CACHE = True
+
+# Mode state checkpoints (cloak plate and calibration, paint canvas),
+# restored at startup and autosaved while running
+CHECKPOINT_ENABLED = True  # Also disabled with --no-checkpoints
+CHECKPOINT_DIR = "checkpoints"
+CHECKPOINT_INTERVAL = 5.0  # Seconds between autosaves
 
 # Snapshot format
 SNAPSHOT_FORMAT = "jpg"  # jpg, png
 SNAPSHOT_QUALITY = 95  # 0-100 for jpg
+SNAPSHOT_WRITER_WORKERS = 2  # Background threads encoding snapshots
+SNAPSHOT_NOTICE_DURATION = 1.0  # Seconds the "Saved" confirmation stays on screen
+SNAPSHOT_BURST_COUNT = 10  # Frames captured by burst mode ([K])
 
 # Recording settings
 RECORDING_CODEC = "XVID"  # XVID, MJPG, MP4V
 RECORDING_FPS = 20  # Recording framerate
 RECORDING_FORMAT = "avi"  # avi, mp4
 
+# Background encoder queue
+RECORDING_QUEUE_SIZE = 32  # Frames buffered for the encoder thread
+RECORDING_DROP_POLICY = "drop_oldest"  # block, drop_oldest, drop_newest
+
 # ============================================================================
 # UI OVERLAY SETTINGS
 # ============================================================================
@@ -94,6 +148,7 @@ UI_FONT_SCALE = 0.7
 UI_FONT_THICKNESS = 2
 UI_FONT_COLOR = (255, 255, 255)  # White
 UI_FONT_BG_COLOR = (0, 0, 0)  # Black
+TEXT_SPRITE_CACHE_SIZE = 256  # Rendered outlined labels kept for reuse
 
 # Mode Name Display
 MODE_NAME_SCALE = 1.0
@@ -120,6 +175,28 @@ MORPH_KERNEL_SIZE = 3
 EROSION_ITERATIONS = 2
 DILATION_ITERATIONS = 2
 
+# Adaptive quality governor: lowers per-mode quality (morphology, blur,
+# temporal smoothing, boundary pass) when frames take longer than the budget
+GOVERNOR_ENABLED = False  # Also enabled with --governor
+GOVERNOR_TARGET_FPS = None  # None = CAMERA_FPS
+GOVERNOR_SMOOTHING = 0.1  # Weight of the newest frame time in the moving average
+GOVERNOR_DOWNGRADE_FRAMES = 15  # Frames over budget before lowering quality
+GOVERNOR_UPGRADE_FRAMES = 90  # Frames with headroom before raising quality
+GOVERNOR_UPGRADE_HEADROOM = 0.7  # Raise quality only below this fraction of the budget
+GOVERNOR_COOLDOWN_FRAMES = 30  # Frames to wait after a change
+GOVERNOR_LABEL_POSITION = (20, 140)
+
+# Strip-parallel pixel work (cloak compositing, ghost accumulation): frames
+# are split into horizontal strips processed on a thread pool
+PARALLEL_WORKERS = None  # None = one per CPU core, 1 = no worker threads
+PARALLEL_MIN_STRIP_ROWS = 64  # Frames are never split into shorter strips
+
+# Stage profiling (per-stage timings inside process_frame and the main loop)
+PROFILE_STAGES = False  # Also enabled with --profile
+PROFILE_OVERLAY = True  # Show the per-stage breakdown instead of the FPS counter
+PROFILE_WINDOW = 120  # Frames kept per stage for the rolling statistics
+PROFILE_LOG_INTERVAL = 10.0  # Seconds between summaries in the log
+
 # ============================================================================
 # LOGGING SETTINGS
 # ============================================================================
@@ -146,6 +223,37 @@ WAITKEY_DELAY = 1
 # Window name
 WINDOW_NAME = "Cerberus Magic Mirror"
 
+# Cloak background plate: "median" (exact per-pixel median of the captured
+# frames) or "approx" (running estimate, one frame of memory)
+CLOAK_BACKGROUND_ESTIMATOR = "median"
+
+# Keep the cloak background plate current under slow lighting drift by
+# blending pixels that look like background into it, one strip at a time
+CLOAK_BACKGROUND_ADAPT = True
+CLOAK_BACKGROUND_ADAPT_RATE = 0.1  # Blend weight per strip update
+CLOAK_BACKGROUND_ADAPT_INTERVAL = 2  # Frames between strip updates
+CLOAK_BACKGROUND_ADAPT_STRIPS = 8  # Strips per full plate refresh
+CLOAK_BACKGROUND_ADAPT_THRESHOLD = 20  # Larger per-channel differences count as foreground
+
+# Cloak temporal mask smoothing: "uniform" (mean of the last N masks) or
+# "exponential" (decaying average, alpha = 2 / (N + 1))
+CLOAK_TEMPORAL_WEIGHTING = "uniform"
+CLOAK_TEMPORAL_WINDOW = 7
+
+# Cloak ROI tracking: between full-frame scans only the area around the
+# cloak (plus a margin in pixels) is processed
+CLOAK_ROI_TRACKING = True
+CLOAK_ROI_MARGIN = 48
+CLOAK_ROI_RESCAN_INTERVAL = 15  # Frames between full-frame scans
+
+# Cloak mask resolution: 1 = full, 2 = half, 4 = quarter. Segmentation,
+# morphology, smoothing and feathering run at the lower resolution and the
+# mask is upsampled for compositing at full resolution.
+CLOAK_MASK_SCALE = 1
+CLOAK_MASK_UPSAMPLE = "linear"  # linear, or guided (edge-aware: snaps edges to the image)
+CLOAK_GUIDED_RADIUS = 4  # Guided filter radius in mask pixels
+CLOAK_GUIDED_EPS = 1e-3  # Guided filter regularization (larger = softer edges)
+
 # ============================================================================
 # ADVANCED PAINT MODE SETTINGS
 # ============================================================================
@@ -171,6 +279,10 @@ PAINT_BRUSH_SIZES = [2, 5, 10, 15, 20]
 
 # Eraser sizes
 PAINT_ERASER_SIZES = [10, 20, 30, 50]
+PAINT_ERASER_RADIUS = 15  # Strokes passing this close to the eraser are removed
+
+# Stroke index grid cell size in pixels (erase hit tests, region redraws)
+PAINT_STROKE_GRID_CELL = 64
 
 # UI positions
 PAINT_PALETTE_X = 10
@@ -190,6 +302,7 @@ HELP_TEXT = [
     "  [2] - AR Paint (Full AR)",
     "  [3] - Ghost Trail",
     "  [S] - Save Snapshot",
+    "  [K] - Burst Snapshot",
     "  [R] - Start/Stop Recording",
     "  [H] - Toggle Help",
     "  [P] - Pause",
@@ -202,6 +315,7 @@ HELP_TEXT = [
     "  AR Paint: [Hover] Select Tool",
     "            [F] Toggle Finger/Object",
     "            [C] Clear Canvas",
+    "            [Z] Undo  [Y] Redo",
     "  Ghost: [+/-] Adjust Trail",
     "         [R] Reset Effect",
     "",
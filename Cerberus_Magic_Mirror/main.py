@@ -2,7 +2,9 @@
 # Author: Sudeepa Wanigarathna
 # System: Kali Linux
 
+import argparse
 import cv2
+import numpy as np
 import time
 import os
 import sys
@@ -11,11 +13,51 @@ from modes.air_draw_mode import ARPaintMode
 from modes.ghost_mode import GhostMode
 from utils.overlay import Overlay
 from utils.recorder import VideoRecorder
+from utils.capture import ThreadedCapture
+from utils.frame_source import create_frame_source, FramePacer
+from utils.display import WindowDisplay, HeadlessDisplay, InputScript, FrameHandoff, OUTPUT_SINKS, NO_KEY
+from utils.checkpoint import CheckpointManager
+from utils.image_writer import image_writer
+from utils.parallel import strip_executor
+from utils.profiler import profiler
+from utils.governor import QualityGovernor
 from utils.logger import logger
 import config
 
-def main():
+def parse_args(argv=None):
+    """Parse command line options; anything not given falls back to config.py."""
+    parser = argparse.ArgumentParser(description="Cerberus Magic Mirror")
+    parser.add_argument("--source", choices=["camera", "video", "images", "synthetic"],
+                        help="Frame source (default: config.FRAME_SOURCE)")
+    parser.add_argument("--input", help="Video file, image directory or glob for video/images sources")
+    parser.add_argument("--camera", type=int, help="Camera device index")
+    parser.add_argument("--resolution", help="Requested frame size as WIDTHxHEIGHT")
+    parser.add_argument("--fast", action="store_true",
+                        help="Replay recorded input as fast as possible instead of in real time")
+    parser.add_argument("--loop", action="store_true", help="Loop recorded input")
+    parser.add_argument("--frames", type=int, help="Number of synthetic frames (0 = endless)")
+    parser.add_argument("--seed", type=int, help="Seed for the synthetic source")
+    parser.add_argument("--no-mirror", action="store_true", help="Disable horizontal mirroring")
+    parser.add_argument("--profile", action="store_true", help="Collect and show per-stage timings")
+    parser.add_argument("--governor", action="store_true",
+                        help="Adapt mode quality to hold the target frame rate")
+    parser.add_argument("--headless", action="store_true", help="Run without a window")
+    parser.add_argument("--output", choices=sorted(OUTPUT_SINKS), default="null",
+                        help="Headless output: discard, record to a video file, or raw BGR24 on stdout")
+    parser.add_argument("--script", help="JSON file with scripted key/mouse events for headless runs")
+    parser.add_argument("--max-frames", type=int, help="Stop after this many loop iterations (headless)")
+    parser.add_argument("--no-checkpoints", action="store_true",
+                        help="Start fresh and don't save mode state")
+    return parser.parse_args(argv)
+
+def main(args=None):
     """Main application loop."""
+    if args is None:
+        args = parse_args([])
+    
+    # Create the headless sink first: a stdout pipe must claim stdout
+    # before anything else prints to it
+    sink = OUTPUT_SINKS[args.output]() if args.headless else None
     
     logger.info("Starting Cerberus Magic Mirror")
     
@@ -24,29 +66,50 @@ def main():
     os.makedirs(config.RECORDING_DIR, exist_ok=True)
     os.makedirs(config.LOG_DIR, exist_ok=True)
     
-    # Initialize Webcam
-    logger.info(f"Initializing webcam (device {config.CAMERA_INDEX})")
-    cap = cv2.VideoCapture(config.CAMERA_INDEX)
+    width = height = None
+    if args.resolution:
+        width, height = (int(v) for v in args.resolution.lower().split("x"))
+    mirror_effect = config.MIRROR_EFFECT and not args.no_mirror
+    if args.profile:
+        profiler.set_enabled(True)
+    realtime = config.FRAME_SOURCE_REALTIME and not args.fast
     
-    if not cap.isOpened():
-        error_msg = "Could not open webcam. Please ensure a webcam is connected and accessible."
+    # Initialize frame source
+    try:
+        source = create_frame_source(args.source, args.input,
+                                     realtime=realtime,
+                                     loop=True if args.loop else None,
+                                     width=width, height=height,
+                                     num_frames=args.frames, seed=args.seed,
+                                     camera_index=args.camera)
+    except ValueError as e:
+        logger.error(str(e))
+        print(f"\n❌ ERROR: {e}")
+        sys.exit(1)
+    logger.info(f"Initializing frame source: {source.get_name()}")
+    
+    if not source.is_opened():
+        if source.is_live:
+            error_msg = "Could not open webcam. Please ensure a webcam is connected and accessible."
+        else:
+            error_msg = f"Could not open input: {source.get_name()}"
         logger.error(error_msg)
         print(f"\n❌ ERROR: {error_msg}")
-        print("\nTroubleshooting:")
-        print("1. Check if webcam is connected: ls /dev/video*")
-        print("2. Check permissions: sudo usermod -aG video $USER")
-        print("3. Try different camera index in config.py")
+        if source.is_live:
+            print("\nTroubleshooting:")
+            print("1. Check if webcam is connected: ls /dev/video*")
+            print("2. Check permissions: sudo usermod -aG video $USER")
+            print("3. Try different camera index in config.py")
         sys.exit(1)
-
-    # Set camera properties
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, config.CAMERA_WIDTH)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, config.CAMERA_HEIGHT)
-    cap.set(cv2.CAP_PROP_FPS, config.CAMERA_FPS)
     
     # Get actual resolution
-    actual_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    actual_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    logger.info(f"Camera resolution: {actual_width}x{actual_height}")
+    actual_width, actual_height = source.get_size()
+    logger.info(f"Source resolution: {actual_width}x{actual_height}")
+
+    # Start capture thread so source I/O overlaps with processing.
+    # Live input always jumps to the newest frame; recorded input replayed
+    # as fast as possible keeps every frame.
+    capture = ThreadedCapture(source, drop_frames=source.is_live or realtime).start()
 
     # Initialize Modes (Only 3 Essential Modes)
     modes = {
@@ -55,10 +118,21 @@ def main():
         ord('3'): GhostMode(),
     }
     
+    # Resume the previous session's background plate, calibration and canvas
+    checkpoints = CheckpointManager(enabled=config.CHECKPOINT_ENABLED and not args.no_checkpoints)
+    checkpoints.restore(modes.values())
+    
     # Default Mode
     current_mode = modes[ord('1')]
     logger.log_mode_switch(current_mode.get_name())
     
+    # Adaptive quality governor
+    governor = None
+    if config.GOVERNOR_ENABLED or args.governor:
+        governor = QualityGovernor()
+        governor.attach(current_mode)
+        logger.info(f"Quality governor enabled (budget {governor.budget * 1000:.1f}ms)")
+    
     # Initialize Video Recorder
     recorder = VideoRecorder()
     
@@ -69,18 +143,28 @@ def main():
     fps_start_time = time.time()
     current_fps = 0
     
-    # Mouse callback state
-    mouse_frame = None
+    # Mouse callback state. Modes never draw on the frame they are given,
+    # so it stays clean while paused and the handoff copies lazily.
+    frame_handoff = FrameHandoff()
+    pause_screen = None
+    # While paused nothing waits for the camera; hold the loop (and the
+    # headless output) to the camera frame rate instead of spinning
+    pause_pacer = FramePacer(config.CAMERA_FPS)
     
     def mouse_callback(event, x, y, flags, param):
         """Global mouse callback for all modes."""
-        nonlocal mouse_frame
+        mouse_frame = frame_handoff.get(event)
         if mouse_frame is not None and hasattr(current_mode, 'handle_mouse'):
             current_mode.handle_mouse(event, x, y, mouse_frame)
     
-    # Set mouse callback
-    cv2.namedWindow(config.WINDOW_NAME)
-    cv2.setMouseCallback(config.WINDOW_NAME, mouse_callback)
+    # Output window, or sink + scripted input when headless
+    if args.headless:
+        script = InputScript.load(args.script) if args.script else InputScript()
+        display = HeadlessDisplay(sink, script,
+                                  mouse_callback=mouse_callback, max_frames=args.max_frames)
+        logger.info(f"Running headless (output: {args.output})")
+    else:
+        display = WindowDisplay(config.WINDOW_NAME, mouse_callback)
     
     # Welcome message
     print("\n" + "="*60)
@@ -93,28 +177,38 @@ def main():
     print("  [2] AR Paint Mode (Full AR)")
     print("  [3] Ghost Trail")
     print("\nControls:")
-    print("  [S] Snapshot  [R] Record  [H] Help  [P] Pause  [Q] Quit")
+    print("  [S] Snapshot  [K] Burst  [R] Record  [H] Help  [P] Pause  [Q] Quit")
     print("="*60)
     print("\n✅ Application started successfully!\n")
 
-    while True:
+    frames_processed = 0
+    run_start_time = time.time()
+
+    while not display.is_finished():
         if not paused:
-            ret, frame = cap.read()
+            ret, frame, frame_timestamp = capture.read()
             if not ret:
+                if not source.is_live and not capture.is_running:
+                    logger.info("End of input reached")
+                    print("\n🏁 End of input reached")
+                    break
                 error_msg = "Failed to capture frame"
                 logger.error(error_msg)
                 print(f"\n❌ ERROR: {error_msg}")
                 break
 
             # Flip frame for mirror effect
-            if config.MIRROR_EFFECT:
+            if mirror_effect:
                 frame = cv2.flip(frame, 1)
             
-            # Store frame for mouse callback
-            mouse_frame = frame.copy()
+            # Hand frame to the mouse callback (copied only on click)
+            frame_handoff.publish(frame)
+            
+            # Collect frames for an active burst
+            image_writer.add_burst_frame(frame)
 
         # Handle Input
-        key = cv2.waitKey(config.WAITKEY_DELAY) & 0xFF
+        key = display.poll_key()
 
         # Global controls
         if key == ord('q') or key == ord('Q'):
@@ -132,24 +226,16 @@ def main():
             continue
             
         elif key == ord('s') or key == ord('S'):
-            # Save Snapshot
+            # Save Snapshot (encoded and written in the background)
             timestamp = time.strftime("%Y%m%d-%H%M%S")
             filename = os.path.join(config.SNAPSHOT_DIR, f"snapshot_{timestamp}.{config.SNAPSHOT_FORMAT}")
+            image_writer.save(filename, frame)
+            print(f"📸 Saving snapshot: {filename}")
             
-            if config.SNAPSHOT_FORMAT.lower() == 'jpg':
-                cv2.imwrite(filename, frame, [cv2.IMWRITE_JPEG_QUALITY, config.SNAPSHOT_QUALITY])
-            else:
-                cv2.imwrite(filename, frame)
-            
-            logger.log_snapshot(filename)
-            print(f"📸 Snapshot saved: {filename}")
-            
-            # Show brief confirmation
-            temp_frame = frame.copy()
-            Overlay.draw_text(temp_frame, "Snapshot Saved!", (50, 50), color=(0, 255, 0), scale=1.5, thickness=3)
-            cv2.imshow(config.WINDOW_NAME, temp_frame)
-            cv2.waitKey(300)
-            continue
+        elif key == ord('k') or key == ord('K'):
+            # Burst: capture consecutive frames to memory, write afterwards
+            if image_writer.start_burst():
+                print(f"📸 Burst started ({config.SNAPSHOT_BURST_COUNT} frames)")
             
         elif key == ord('r') or key == ord('R'):
             # Toggle recording (but not if in ghost mode where R is reset)
@@ -169,27 +255,33 @@ def main():
         elif key in modes:
             # Switch mode
             current_mode = modes[key]
+            if governor is not None:
+                governor.attach(current_mode)
             logger.log_mode_switch(current_mode.get_name())
             print(f"✨ Switched to: {current_mode.get_name()}")
             
-        elif key != 255:  # 255 means no key pressed
+        elif key != NO_KEY:
             # Pass other keys to current mode
             current_mode.handle_input(key)
 
         if paused:
-            # Show paused indicator
-            display_frame = frame.copy()
-            h, w = display_frame.shape[:2]
-            cv2.rectangle(display_frame, (0, 0), (w, h), (0, 0, 0), -1)
-            cv2.putText(display_frame, "PAUSED", (w//2 - 100, h//2),
-                       cv2.FONT_HERSHEY_SIMPLEX, 2, (255, 255, 255), 4)
-            cv2.putText(display_frame, "Press P to resume", (w//2 - 150, h//2 + 50),
-                       cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
-            cv2.imshow(config.WINDOW_NAME, display_frame)
+            # Show paused indicator (rendered once per frame size)
+            if pause_screen is None or pause_screen.shape != frame.shape:
+                pause_screen = np.zeros_like(frame)
+                h, w = pause_screen.shape[:2]
+                cv2.putText(pause_screen, "PAUSED", (w//2 - 100, h//2),
+                           cv2.FONT_HERSHEY_SIMPLEX, 2, (255, 255, 255), 4)
+                cv2.putText(pause_screen, "Press P to resume", (w//2 - 150, h//2 + 50),
+                           cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+            display.show(pause_screen)
+            pause_pacer.wait()
             continue
 
         # Process Frame
-        processed_frame = current_mode.process_frame(frame)
+        work_start = time.perf_counter()
+        with profiler.stage("frame.process"):
+            processed_frame = current_mode.process_frame(frame, frame_timestamp)
+        frames_processed += 1
 
         # Calculate FPS
         fps_counter += 1
@@ -199,55 +291,96 @@ def main():
             fps_start_time = time.time()
 
         # Draw Overlays
-        if current_mode.get_name():
-            Overlay.draw_status(processed_frame, current_mode.get_name(), current_mode.get_controls())
-        
-        # Draw recording indicator
-        if recorder.is_recording:
-            h, w = processed_frame.shape[:2]
-            cv2.circle(processed_frame, (w - 30, 30), config.RECORDING_INDICATOR_SIZE, 
-                      config.RECORDING_INDICATOR_COLOR, -1)
-            status = recorder.get_recording_status()
-            rec_text = f"REC {status['duration']:.0f}s"
-            cv2.putText(processed_frame, rec_text, (w - 120, 40),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
-        
-        # Draw FPS counter
-        if config.SHOW_FPS:
-            Overlay.draw_text(processed_frame, f"FPS: {current_fps}", 
-                            config.FPS_POSITION, color=config.FPS_COLOR)
-        
-        # Draw help overlay
-        if show_help:
-            h, w = processed_frame.shape[:2]
-            overlay = processed_frame.copy()
-            cv2.rectangle(overlay, (50, 50), (w - 50, h - 50), (0, 0, 0), -1)
-            cv2.addWeighted(overlay, 0.7, processed_frame, 0.3, 0, processed_frame)
+        with profiler.stage("frame.overlay"):
+            if current_mode.get_name():
+                Overlay.draw_status(processed_frame, current_mode.get_name(), current_mode.get_controls())
             
-            y_offset = 80
-            for line in config.HELP_TEXT:
-                cv2.putText(processed_frame, line, (70, y_offset),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-                y_offset += 25
+            # Draw recording indicator
+            if recorder.is_recording:
+                h, w = processed_frame.shape[:2]
+                cv2.circle(processed_frame, (w - 30, 30), config.RECORDING_INDICATOR_SIZE, 
+                          config.RECORDING_INDICATOR_COLOR, -1)
+                status = recorder.get_recording_status()
+                rec_text = f"REC {status['duration']:.0f}s"
+                cv2.putText(processed_frame, rec_text, (w - 120, 40),
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
+            
+            # Draw per-stage breakdown, or the FPS counter with capture freshness
+            if profiler.enabled and config.PROFILE_OVERLAY:
+                Overlay.draw_text(processed_frame, f"FPS: {current_fps}", config.FPS_POSITION,
+                                color=config.FPS_COLOR, scale=0.5, thickness=1, cache=False)
+                x, y = config.FPS_POSITION
+                profiler.draw(processed_frame, (x, y + 22),
+                              lambda f, text, pos: Overlay.draw_text(f, text, pos, color=config.FPS_COLOR,
+                                                                     scale=0.45, thickness=1, cache=False))
+            elif config.SHOW_FPS:
+                capture_stats = capture.get_stats()
+                fps_text = (f"FPS: {current_fps}  Age: {capture_stats['last_frame_age'] * 1000:.0f}ms  "
+                            f"Dropped: {capture_stats['dropped']}")
+                Overlay.draw_text(processed_frame, fps_text, 
+                                config.FPS_POSITION, color=config.FPS_COLOR, cache=False)
+            
+            # Current quality level
+            if governor is not None:
+                Overlay.draw_text(processed_frame, governor.get_label(), config.GOVERNOR_LABEL_POSITION,
+                                color=(0, 200, 255), scale=0.5, thickness=1)
+            
+            # Snapshot confirmation (non-blocking)
+            notice = image_writer.get_notice()
+            if notice:
+                Overlay.draw_text(processed_frame, notice, (50, 50), color=(0, 255, 0), scale=1.5, thickness=3)
+            
+            # Draw help overlay
+            if show_help:
+                h, w = processed_frame.shape[:2]
+                Overlay.draw_panel(processed_frame, (50, 50), (w - 50, h - 50), (0, 0, 0), 0.7)
+            
+                y_offset = 80
+                for line in config.HELP_TEXT:
+                    cv2.putText(processed_frame, line, (70, y_offset),
+                               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+                    y_offset += 25
 
         # Write frame to recording if active
         if recorder.is_recording:
-            recorder.write_frame(processed_frame)
+            with profiler.stage("frame.record"):
+                recorder.write_frame(processed_frame)
 
         # Show Frame
-        cv2.imshow(config.WINDOW_NAME, processed_frame)
+        with profiler.stage("frame.display"):
+            display.show(processed_frame)
+        profiler.log_summary_if_due()
+        checkpoints.autosave(modes.values())
+        
+        # Let the governor react to this frame's work time (camera wait excluded)
+        if governor is not None:
+            governor.observe(time.perf_counter() - work_start)
 
     # Cleanup
+    run_time = time.time() - run_start_time
+    logger.info(f"Processed {frames_processed} frames in {run_time:.1f}s "
+                f"({frames_processed / run_time if run_time > 0 else 0:.1f} FPS)")
+    if profiler.enabled:
+        profiler.log_summary()
     logger.info("Cleaning up resources")
+    checkpoints.save(modes.values())
+    checkpoints.close()
+    for mode in modes.values():
+        mode.close()
     recorder.cleanup()
-    cap.release()
-    cv2.destroyAllWindows()
+    image_writer.shutdown(wait=True)
+    strip_executor.shutdown()
+    capture.stop()
+    capture_stats = capture.get_stats()
+    logger.info(f"Capture: {capture_stats['captured']} captured, {capture_stats['delivered']} displayed, "
+                f"{capture_stats['dropped']} dropped, avg frame age {capture_stats['avg_frame_age'] * 1000:.1f}ms")
+    display.close()
     logger.log_session_end()
     print("\n👋 Cerberus Magic Mirror Closed. Goodbye!\n")
 
 if __name__ == "__main__":
     try:
-        main()
+        main(parse_args())
     except KeyboardInterrupt:
         logger.info("Application interrupted by user")
         print("\n\n⚠️  Interrupted by user. Exiting...")
@@ -1,10 +1,20 @@
 import cv2
 import numpy as np
-from collections import deque
 from .base_mode import BaseMode
 import config
 import time
 import math
+from utils.checkpoint import DirtyRegion
+from utils.color_lut import ColorLUT
+from utils.compositing import AlphaCompositor
+from utils.hand_tracker import AsyncHandTracker, prepare_hand_input
+from utils.image_writer import image_writer
+from utils.logger import logger
+from utils.overlay import Overlay
+from utils.parallel import strip_executor
+from utils.profiler import profiler
+from utils.strokes import StrokeStore
+from utils.text_cache import text_cache
 
 # Try to import MediaPipe
 try:
@@ -12,17 +22,44 @@ try:
     HAS_MEDIAPIPE = True
 except ImportError:
     HAS_MEDIAPIPE = False
-    print("⚠️ MediaPipe not found. Finger tracking will use legacy color mode.")
+    logger.warning("MediaPipe not found. Finger tracking will use legacy color mode.")
+
+# MediaPipe hand landmark indices
+THUMB_TIP = 4
+INDEX_TIP = 8
+MIDDLE_TIP = 12
+
+# Quality levels for the governor (0 = best): morphology passes on the
+# tracking mask and whether it is blurred before contour detection.
+PAINT_QUALITY_LEVELS = [
+    {'iterations': 2, 'blur': True},
+    {'iterations': 1, 'blur': True},
+    {'iterations': 1, 'blur': False},
+]
 
 class ARPaintMode(BaseMode):
     def __init__(self):
         # Tracking colors
         self.lower_blue = np.array(config.DRAW_LOWER_BLUE)
         self.upper_blue = np.array(config.DRAW_UPPER_BLUE)
+        self.color_lut = None
+        self._update_color_classifier()
         
         self.tracking_mode = 'object'  # Default to object mode for better compatibility
+        # Canvas colours are premultiplied by coverage (the paint's alpha),
+        # so black paint is possible and antialiased edges blend correctly
         self.canvas = None
-        self.points = deque(maxlen=config.DRAW_MAX_POINTS)
+        self.coverage = None
+        self.painted = DirtyRegion()  # Bounding box of everything with coverage
+        self.compositor = AlphaCompositor()
+        self.output = None  # Reused every frame; the input frame is left untouched
+        self.canvas_dirty = DirtyRegion()  # Canvas area changed since the last checkpoint
+        self.canvas_checkpointed = False
+        self.checkpoint_state = None  # Settings as last saved
+        self.strokes = StrokeStore()  # Everything painted, with undo/redo
+        self.current_stroke = None  # Stroke being drawn, if any
+        self.erasing = False  # An eraser gesture has removed strokes
+        self.strokes_checkpointed = 0  # StrokeStore.version last saved
         
         # MediaPipe Setup
         if HAS_MEDIAPIPE:
@@ -32,7 +69,7 @@ class ARPaintMode(BaseMode):
                 min_tracking_confidence=0.7,
                 max_num_hands=1
             )
-            self.mp_draw = mp.solutions.drawing_utils
+            self.hand_tracker = AsyncHandTracker(self._detect_hand)
         
         # Paint settings
         self.colors = config.PAINT_COLORS
@@ -57,6 +94,11 @@ class ARPaintMode(BaseMode):
         self.calibration_mode = False
         self.calibrated_color = None
         
+        # Quality level (lowered by the governor on slow hardware)
+        self.quality_level = 0
+        self.morph_iterations = 2
+        self.mask_blur = True
+        
     def calibrate_from_click(self, frame, x, y):
         """Calibrate tracking color from clicked point."""
         hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
@@ -80,51 +122,79 @@ class ARPaintMode(BaseMode):
         self.upper_blue = np.array([min(180, h_mean + tolerance), 255, 255])
         
         self.calibrated_color = (int(h_mean), int(s_mean), int(v_mean))
+        self._update_color_classifier()
         print(f"✓ Calibrated to HSV: {self.calibrated_color}")
+
+    def _update_color_classifier(self):
+        """Rebuild the colour lookup table for the current tracking range."""
+        if config.DRAW_COLOR_CLASSIFIER == "lut":
+            self.color_lut = ColorLUT([(self.lower_blue, self.upper_blue)])
+        else:
+            self.color_lut = None
         
     def _calculate_distance(self, p1, p2):
         """Calculate Euclidean distance between two points."""
         return math.hypot(p1[0] - p2[0], p1[1] - p2[1])
 
-    def _get_fingertip_mediapipe(self, frame):
-        """Get fingertip position and detect pinch gesture."""
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    def _detect_hand(self, frame):
+        """
+        Find hand landmarks in a frame (runs on the hand tracking worker).
+
+        The model gets the whole frame; frames above 720p are downscaled
+        before the colour conversion (see prepare_hand_input).
+
+        Returns:
+            numpy.ndarray: (21, 2) float32 landmark pixel coordinates, or None
+        """
+        rgb_frame = prepare_hand_input(frame)
         results = self.hands.process(rgb_frame)
         
         if results.multi_hand_landmarks:
             hand_landmarks = results.multi_hand_landmarks[0]
             h, w, _ = frame.shape
+            points = np.array([(lm.x, lm.y) for lm in hand_landmarks.landmark], dtype=np.float32)
+            return points * np.array([w, h], dtype=np.float32)
             
-            # Get landmarks
-            index_tip = (int(hand_landmarks.landmark[8].x * w), int(hand_landmarks.landmark[8].y * h))
-            thumb_tip = (int(hand_landmarks.landmark[4].x * w), int(hand_landmarks.landmark[4].y * h))
-            middle_tip = (int(hand_landmarks.landmark[12].x * w), int(hand_landmarks.landmark[12].y * h))
-            
-            # Calculate distances
-            pinch_dist = self._calculate_distance(index_tip, thumb_tip)
-            erase_dist = self._calculate_distance(index_tip, middle_tip)
-            
-            # Determine gesture
-            gesture = 'hover'
-            PINCH_THRESHOLD = 40
-            ERASE_THRESHOLD = 45
-            
-            if erase_dist < ERASE_THRESHOLD:
-                gesture = 'erase'
-            elif pinch_dist < PINCH_THRESHOLD:
-                gesture = 'draw'
-            
-            return index_tip, gesture, hand_landmarks
-            
-        return None, 'hover', None
+        return None
+
+    def _classify_gesture(self, points):
+        """
+        Get the fingertip position and detect pinch gestures from landmarks.
+
+        Returns:
+            tuple: (index_tip, gesture)
+        """
+        index_tip = tuple(int(v) for v in points[INDEX_TIP])
+        thumb_tip = tuple(int(v) for v in points[THUMB_TIP])
+        middle_tip = tuple(int(v) for v in points[MIDDLE_TIP])
+        
+        # Calculate distances
+        pinch_dist = self._calculate_distance(index_tip, thumb_tip)
+        erase_dist = self._calculate_distance(index_tip, middle_tip)
+        
+        # Determine gesture
+        gesture = 'hover'
+        PINCH_THRESHOLD = 40
+        ERASE_THRESHOLD = 45
+        
+        if erase_dist < ERASE_THRESHOLD:
+            gesture = 'erase'
+        elif pinch_dist < PINCH_THRESHOLD:
+            gesture = 'draw'
+        
+        return index_tip, gesture
 
-    def _draw_text(self, frame, text, pos, scale=0.6, color=(255, 255, 255), thickness=2):
-        """Draw text with outline."""
-        font = cv2.FONT_HERSHEY_SIMPLEX
-        # Outline
-        cv2.putText(frame, text, pos, font, scale, (0, 0, 0), thickness + 2, cv2.LINE_AA)
-        # Text
-        cv2.putText(frame, text, pos, font, scale, color, thickness, cv2.LINE_AA)
+    def _draw_hand(self, frame, points):
+        """Draw the hand skeleton from (extrapolated) landmarks."""
+        pts = points.astype(np.int32)
+        for a, b in self.mp_hands.HAND_CONNECTIONS:
+            cv2.line(frame, tuple(pts[a].tolist()), tuple(pts[b].tolist()), (224, 224, 224), 2)
+        for x, y in pts.tolist():
+            cv2.circle(frame, (x, y), 3, (0, 0, 255), -1)
+
+    def _draw_text(self, frame, text, pos, scale=0.6, color=(255, 255, 255), thickness=2, cache=True):
+        """Draw text with outline (cache=False for text that changes every frame)."""
+        text_cache.draw(frame, text, pos, scale, color, thickness, (0, 0, 0), thickness + 2, cache)
 
     def _check_ui_click(self, x, y, h, w):
         """Check if position clicks any UI element."""
@@ -214,9 +284,7 @@ class ARPaintMode(BaseMode):
                 print("⚠️ MediaPipe not available. Install it to use finger tracking.")
         
         elif element['type'] == 'clear':
-            self.canvas = None
-            self.points.clear()
-            print("🗑️ Canvas cleared")
+            self._clear_canvas()
             
         elif element['type'] == 'save':
             self._save_canvas()
@@ -244,31 +312,48 @@ class ARPaintMode(BaseMode):
             print(f"🖌️ Brush size: {self.current_brush_size}px")
 
     def _save_canvas(self):
-        """Save the current canvas."""
+        """Save the current canvas as a PNG with transparency."""
         if self.canvas is not None:
             timestamp = time.strftime("%Y%m%d-%H%M%S")
             filename = f"{config.SNAPSHOT_DIR}/painting_{timestamp}.png"
-            # We need to save the combined result, not just the black canvas
-            # But usually people want the art. The canvas is black background with colored lines.
-            # Let's save the canvas itself.
-            cv2.imwrite(filename, self.canvas)
+            # Undo the premultiplication so edges keep their colour over any background
+            coverage = cv2.merge((self.coverage, self.coverage, self.coverage))
+            colors = cv2.divide(self.canvas, coverage, scale=255)
+            image_writer.save(filename, np.dstack((colors, self.coverage)), notice="Painting Saved!")
             print(f"💾 Painting saved: {filename}")
         else:
             print("⚠️ Canvas is empty!")
 
-    def process_frame(self, frame):
+    def process_frame(self, frame, timestamp=None):
         h, w = frame.shape[:2]
         
-        if self.canvas is None:
+        # A canvas restored from a checkpoint may be from another camera size
+        if self.canvas is None or self.canvas.shape != frame.shape:
             self.canvas = np.zeros_like(frame)
+            self.coverage = np.zeros((h, w), dtype=np.uint8)
+            self.strokes.render(self.canvas, coverage=self.coverage)
+            self._update_painted_bounds()
+            self.canvas_dirty.add(0, 0, w, h)
 
         center = None
-        hand_landmarks = None
+        hand_points = None
         toolbar_y = h - self.toolbar_height
 
         # --- TRACKING ---
         if self.tracking_mode == 'finger' and HAS_MEDIAPIPE:
-            center, self.gesture_mode, hand_landmarks = self._get_fingertip_mediapipe(frame)
+            # Inference runs on the tracker's worker; this only hands over the
+            # frame and extrapolates the latest landmarks to the present.
+            # Results are stamped with the capture time, so landmark age and
+            # extrapolation include capture and queue latency.
+            with profiler.stage("paint.hand_tracking"):
+                now = time.time()
+                self.hand_tracker.submit(frame, now if timestamp is None else timestamp)
+                hand_points = self.hand_tracker.get(now)
+            
+            if hand_points is not None:
+                center, self.gesture_mode = self._classify_gesture(hand_points)
+            else:
+                self.gesture_mode = 'hover'
             
             if self.gesture_mode == 'erase':
                 self.is_eraser = True
@@ -276,27 +361,35 @@ class ARPaintMode(BaseMode):
                 self.is_eraser = False
         else:
             # Object tracking
-            hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-            mask = cv2.inRange(hsv, self.lower_blue, self.upper_blue)
-            kernel = np.ones((5, 5), np.uint8)
-            mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel, iterations=2)
-            mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel, iterations=2)
-            mask = cv2.GaussianBlur(mask, (7, 7), 0)
+            with profiler.stage("paint.color_mask"):
+                if self.color_lut is not None:
+                    mask = self.color_lut.classify(frame)
+                else:
+                    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+                    mask = cv2.inRange(hsv, self.lower_blue, self.upper_blue)
+            with profiler.stage("paint.morphology"):
+                kernel = np.ones((5, 5), np.uint8)
+                mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel, iterations=self.morph_iterations)
+                mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel, iterations=self.morph_iterations)
+                if self.mask_blur:
+                    mask = cv2.GaussianBlur(mask, (7, 7), 0)
             
-            cnts, _ = cv2.findContours(mask.copy(), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            if len(cnts) > 0:
-                c = max(cnts, key=cv2.contourArea)
-                ((x, y), radius) = cv2.minEnclosingCircle(c)
-                M = cv2.moments(c)
-                if M["m00"] > 0 and radius > config.DRAW_MIN_RADIUS:
-                    center = (int(M["m10"] / M["m00"]), int(M["m01"] / M["m00"]))
-                    self.gesture_mode = 'draw'
+            with profiler.stage("paint.contours"):
+                cnts, _ = cv2.findContours(mask.copy(), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+                if len(cnts) > 0:
+                    c = max(cnts, key=cv2.contourArea)
+                    ((x, y), radius) = cv2.minEnclosingCircle(c)
+                    M = cv2.moments(c)
+                    if M["m00"] > 0 and radius > config.DRAW_MIN_RADIUS:
+                        center = (int(M["m10"] / M["m00"]), int(M["m01"] / M["m00"]))
+                        self.gesture_mode = 'draw'
             
             if not center:
                 self.gesture_mode = 'hover'
 
         # --- DRAWING & INTERACTION ---
         hover_progress = 0
+        pen_point = None  # Drawing/erasing position this frame
         
         # Handle calibration click
         if self.calibration_mode:
@@ -305,6 +398,13 @@ class ARPaintMode(BaseMode):
              # We need to implement handle_mouse in this class.
              pass
         
+        # Everything below draws on the output, so the frame stays clean for
+        # mouse clicks (colour calibration) and snapshots
+        if self.output is None or self.output.shape != frame.shape:
+            self.output = np.empty_like(frame)
+        result = self.output
+        np.copyto(result, frame)
+        
         if center:
             cx, cy = center
             
@@ -312,17 +412,15 @@ class ARPaintMode(BaseMode):
             cursor_color = (0, 255, 0) if self.gesture_mode == 'draw' else (0, 100, 255) if self.gesture_mode == 'erase' else (200, 200, 200)
             cursor_radius = 12 if self.gesture_mode == 'draw' else 16
             
-            cv2.circle(frame, (cx, cy), cursor_radius, cursor_color, -1)
-            cv2.circle(frame, (cx, cy), cursor_radius + 3, (255, 255, 255), 2)
+            cv2.circle(result, (cx, cy), cursor_radius, cursor_color, -1)
+            cv2.circle(result, (cx, cy), cursor_radius + 3, (255, 255, 255), 2)
             
             # Draw hand skeleton
-            if hand_landmarks and HAS_MEDIAPIPE:
-                self.mp_draw.draw_landmarks(frame, hand_landmarks, self.mp_hands.HAND_CONNECTIONS)
+            if hand_points is not None:
+                self._draw_hand(result, hand_points)
 
             # UI Interaction
             if cy >= toolbar_y - 50:
-                self.points.clear()
-                
                 element = self._check_ui_click(cx, cy, h, w)
                 if element:
                     if self.hover_element and self.hover_element['type'] == element['type']:
@@ -347,37 +445,48 @@ class ARPaintMode(BaseMode):
                 self.hover_element = None
                 
                 if self.gesture_mode in ['draw', 'erase']:
-                    self.points.appendleft(center)
-                else:
-                    if len(self.points) > 0 and self.points[0] is not None:
-                        self.points.appendleft(None)
+                    pen_point = center
         else:
-            if len(self.points) > 0 and self.points[0] is not None:
-                self.points.appendleft(None)
             self.hover_element = None
 
-        # Render drawing
-        if len(self.points) >= 2:
-            for i in range(1, len(self.points)):
-                if self.points[i-1] is None or self.points[i] is None:
-                    continue
-                
-                if self.points[i-1][1] < toolbar_y and self.points[i][1] < toolbar_y:
-                    color = (0, 0, 0) if self.is_eraser else self.drawing_color
-                    thickness = 30 if self.is_eraser else self.current_brush_size
-                    cv2.line(self.canvas, self.points[i], self.points[i-1], color, thickness, cv2.LINE_AA)
-        
-        # Combine canvas and frame
-        gray_canvas = cv2.cvtColor(self.canvas, cv2.COLOR_BGR2GRAY)
-        _, canvas_mask = cv2.threshold(gray_canvas, 1, 255, cv2.THRESH_BINARY)
-        canvas_inv = cv2.bitwise_not(canvas_mask)
-        
-        frame_bg = cv2.bitwise_and(frame, frame, mask=canvas_inv)
-        canvas_fg = cv2.bitwise_and(self.canvas, self.canvas, mask=canvas_mask)
-        result = cv2.add(frame_bg, canvas_fg)
+        # Render drawing: older segments are already on the canvas, so only
+        # the one ending at this frame's point is rasterized
+        with profiler.stage("paint.strokes"):
+            if pen_point is None:
+                self._end_stroke()
+            elif self.is_eraser:
+                self._end_stroke(keep_erasing=True)
+                hits = self.strokes.hit_test(pen_point, config.PAINT_ERASER_RADIUS)
+                if hits:
+                    self._redraw(self.strokes.erase(hits, merge=self.erasing))
+                    self.erasing = True
+            elif self.current_stroke is None:
+                self.erasing = False
+                self.current_stroke = self.strokes.begin(pen_point, self.drawing_color, self.current_brush_size)
+            else:
+                stroke = self.current_stroke
+                start = tuple(stroke.points[stroke.count - 1].tolist())
+                self.strokes.extend(stroke, pen_point)
+                cv2.line(self.canvas, start, pen_point, stroke.color, stroke.width, cv2.LINE_AA)
+                cv2.line(self.coverage, start, pen_point, 255, stroke.width, cv2.LINE_AA)
+                pad = stroke.width // 2 + 2
+                rect = (min(start[0], pen_point[0]) - pad, min(start[1], pen_point[1]) - pad,
+                        max(start[0], pen_point[0]) + pad + 1, max(start[1], pen_point[1]) + pad + 1)
+                self.canvas_dirty.add(*rect)
+                self.painted.add(*rect)
+        
+        # Combine canvas and frame, in place and only where something is painted
+        with profiler.stage("paint.composite"):
+            rect = self.painted.clipped(frame.shape)
+            if rect is not None:
+                x0, y0, x1, y1 = rect
+                roi = result[y0:y1, x0:x1]
+                self.compositor.over(roi, self.canvas[y0:y1, x0:x1], self.coverage[y0:y1, x0:x1],
+                                     out=roi, executor=strip_executor)
         
         # Draw UI
-        self._draw_ui(result, h, w, hover_progress)
+        with profiler.stage("paint.ui"):
+            self._draw_ui(result, h, w, hover_progress)
         
         return result
 
@@ -387,9 +496,7 @@ class ARPaintMode(BaseMode):
         
         # === TOP STATUS BAR ===
         status_bar_h = 40
-        overlay = frame.copy()
-        cv2.rectangle(overlay, (0, 0), (w, status_bar_h), (20, 20, 20), -1)
-        cv2.addWeighted(overlay, 0.85, frame, 0.15, 0, frame)
+        Overlay.draw_panel(frame, (0, 0), (w, status_bar_h), (20, 20, 20), 0.85)
         cv2.line(frame, (0, status_bar_h), (w, status_bar_h), (0, 200, 255), 2)
         
         # Tracking mode indicator
@@ -403,6 +510,12 @@ class ARPaintMode(BaseMode):
             g_color = (0, 255, 0) if self.gesture_mode == 'draw' else (0, 100, 255) if self.gesture_mode == 'erase' else (200, 200, 200)
             text_w = cv2.getTextSize(gesture_text, cv2.FONT_HERSHEY_SIMPLEX, 0.7, 2)[0][0]
             self._draw_text(frame, gesture_text, (w//2 - text_w//2, 27), 0.7, g_color, 2)
+            
+            # Hand model rate and how far behind the landmarks are
+            if HAS_MEDIAPIPE:
+                stats = self.hand_tracker.get_stats()
+                tracker_text = f"Hand model: {stats['rate']:.0f}/s | Landmarks: {stats['age'] * 1000:.0f}ms old"
+                self._draw_text(frame, tracker_text, (20, status_bar_h + 22), 0.5, (180, 180, 180), 1, cache=False)
         
         # Help text
         if self.calibration_mode:
@@ -432,9 +545,7 @@ class ARPaintMode(BaseMode):
         self._draw_text(frame, btn_text, (text_x, text_y), 0.6, (255, 255, 255), 2)
         
         # === BOTTOM TOOLBAR ===
-        overlay = frame.copy()
-        cv2.rectangle(overlay, (0, toolbar_y), (w, h), (25, 25, 25), -1)
-        cv2.addWeighted(overlay, 0.92, frame, 0.08, 0, frame)
+        Overlay.draw_panel(frame, (0, toolbar_y), (w, h), (25, 25, 25), 0.92)
         cv2.line(frame, (0, toolbar_y), (w, toolbar_y), (0, 200, 255), 3)
         
         # Section 1: Clear & Save
@@ -509,10 +620,56 @@ class ARPaintMode(BaseMode):
             
             cv2.ellipse(frame, (cx, cy), (22, 22), 0, 0, int(360 * hover_progress), (0, 255, 0), 4)
 
+    def _end_stroke(self, keep_erasing=False):
+        """Finish the stroke being drawn (pen lifted or tool changed)."""
+        if self.current_stroke is not None:
+            self.strokes.end(self.current_stroke)
+            self.current_stroke = None
+        if not keep_erasing:
+            self.erasing = False
+
+    def _redraw(self, rect):
+        """Re-rasterize a canvas region from the stroke store."""
+        if rect is None or self.canvas is None:
+            return
+        rect = self.strokes.render(self.canvas, rect, self.coverage)
+        if rect is not None:
+            self.canvas_dirty.add(*rect)
+            # Erasing can shrink the painted area, so measure it again
+            self._update_painted_bounds()
+
+    def _update_painted_bounds(self):
+        """Recompute the bounding box of the painted pixels."""
+        self.painted.clear()
+        x, y, bw, bh = cv2.boundingRect(self.coverage)
+        if bw and bh:
+            self.painted.add(x, y, x + bw, y + bh)
+
+    def _clear_canvas(self):
+        """Erase every stroke (undoable)."""
+        self._end_stroke()
+        self.strokes.clear()
+        if self.canvas is not None:
+            self.canvas.fill(0)
+            self.coverage.fill(0)
+            self.painted.clear()
+            h, w = self.canvas.shape[:2]
+            self.canvas_dirty.add(0, 0, w, h)
+        print("🗑️ Canvas cleared")
+
     def handle_input(self, key):
         if key == ord('c') or key == ord('C'):
-            self.canvas = None
-            self.points.clear()
+            self._clear_canvas()
+        elif key == ord('z') or key == ord('Z'):
+            self._end_stroke()
+            rect = self.strokes.undo()
+            self._redraw(rect)
+            print("↩️ Undo" if rect is not None else "⚠️ Nothing to undo")
+        elif key == ord('y') or key == ord('Y'):
+            self._end_stroke()
+            rect = self.strokes.redo()
+            self._redraw(rect)
+            print("↪️ Redo" if rect is not None else "⚠️ Nothing to redo")
         elif key == ord('f') or key == ord('F'):
             if HAS_MEDIAPIPE:
                 self.tracking_mode = 'object' if self.tracking_mode == 'finger' else 'finger'
@@ -526,6 +683,84 @@ class ARPaintMode(BaseMode):
                 self.calibrate_from_click(frame, x, y)
                 self.calibration_mode = False
 
+    def save_checkpoint(self, store):
+        """Save the settings, and the canvas area painted since the last save."""
+        state = {
+            'lower_blue': self.lower_blue.tolist(),
+            'upper_blue': self.upper_blue.tolist(),
+            'calibrated_color': None if self.calibrated_color is None else list(self.calibrated_color),
+            'tracking_mode': self.tracking_mode,
+            'selected_color_idx': self.selected_color_idx,
+            'selected_brush_idx': self.selected_brush_idx,
+            'is_eraser': self.is_eraser,
+        }
+        if state != self.checkpoint_state:
+            store.save_state('paint', state)
+            self.checkpoint_state = state
+
+        if self.strokes.version != self.strokes_checkpointed:
+            # The stroke being drawn is logged once it is finished
+            before = None if self.current_stroke is None else self.current_stroke.id
+            self.strokes.save_checkpoint(store, 'paint', before)
+            if self.current_stroke is None:
+                self.strokes_checkpointed = self.strokes.version
+
+        if self.canvas is None:
+            if self.canvas_checkpointed:
+                store.remove_array('paint', 'canvas')
+                store.remove_array('paint', 'coverage')
+                self.canvas_checkpointed = False
+            self.canvas_dirty.clear()
+            return
+        rect = self.canvas_dirty.clipped(self.canvas.shape)
+        if rect is not None:
+            store.update_array('paint', 'canvas', self.canvas, rect)
+            store.update_array('paint', 'coverage', self.coverage, rect)
+            self.canvas_dirty.clear()
+            self.canvas_checkpointed = True
+
+    def restore_checkpoint(self, store):
+        """Restore the settings and canvas."""
+        state = store.load_state('paint')
+        if state is not None:
+            self.lower_blue = np.array(state['lower_blue'])
+            self.upper_blue = np.array(state['upper_blue'])
+            self.calibrated_color = None if state['calibrated_color'] is None else tuple(state['calibrated_color'])
+            if state['tracking_mode'] == 'object' or HAS_MEDIAPIPE:
+                self.tracking_mode = state['tracking_mode']
+            self.selected_color_idx = state['selected_color_idx']
+            self.drawing_color = self.colors[self.selected_color_idx]
+            self.selected_brush_idx = state['selected_brush_idx']
+            self.current_brush_size = config.PAINT_BRUSH_SIZES[self.selected_brush_idx]
+            self.is_eraser = state['is_eraser']
+            self.checkpoint_state = state
+            self._update_color_classifier()
+
+        if self.strokes.restore_checkpoint(store, 'paint'):
+            self.strokes_checkpointed = self.strokes.version
+
+        # Without a matching coverage the canvas is re-rendered from the strokes
+        canvas = store.load_array('paint', 'canvas')
+        coverage = store.load_array('paint', 'coverage')
+        if canvas is not None and coverage is not None and coverage.shape == canvas.shape[:2]:
+            self.canvas = canvas
+            self.coverage = coverage
+            self._update_painted_bounds()
+            self.canvas_checkpointed = True
+
+    def close(self):
+        if HAS_MEDIAPIPE:
+            self.hand_tracker.stop()
+
+    def get_quality_levels(self):
+        return len(PAINT_QUALITY_LEVELS)
+
+    def set_quality_level(self, level):
+        settings = PAINT_QUALITY_LEVELS[level]
+        self.quality_level = level
+        self.morph_iterations = settings['iterations']
+        self.mask_blur = settings['blur']
+
     def get_name(self):
         return ""
 
@@ -2,9 +2,13 @@ from abc import ABC, abstractmethod
 
 class BaseMode(ABC):
     @abstractmethod
-    def process_frame(self, frame):
+    def process_frame(self, frame, timestamp=None):
         """
         Process the input frame and return the result.
+        The result may be a buffer the mode reuses on the next call,
+        so callers that keep it must copy it.
+        timestamp is the frame's capture time in time.time() seconds
+        (None if unknown, e.g. frames read synchronously).
         """
         pass
 
@@ -35,3 +39,43 @@ class BaseMode(ABC):
         Modes that need mouse interaction should override this method.
         """
         pass
+
+    def save_checkpoint(self, store):
+        """
+        Optional: Save state that should survive a restart.
+        Called periodically with a CheckpointWriter (the CheckpointStore
+        write methods, done in the background); modes should only write
+        what changed since their last save.
+        """
+        pass
+
+    def restore_checkpoint(self, store):
+        """
+        Optional: Restore state written by save_checkpoint() at startup.
+        """
+        pass
+
+    def close(self):
+        """
+        Optional: Release resources (e.g. worker threads) at shutdown.
+        """
+        pass
+
+    def get_quality_levels(self):
+        """
+        Optional: Return how many quality levels the mode supports.
+        Level 0 is full quality; higher levels trade quality for speed.
+        """
+        return 1
+
+    def get_quality_level(self):
+        """
+        Optional: Return the current quality level.
+        """
+        return getattr(self, 'quality_level', 0)
+
+    def set_quality_level(self, level):
+        """
+        Optional: Switch to a quality level (used by the quality governor).
+        """
+        pass
@@ -1,26 +1,47 @@
 import cv2
 import numpy as np
 import time
-from collections import deque
 from .base_mode import BaseMode
+from utils.background import BackgroundAdapter, create_background_estimator
+from utils.checkpoint import DirtyRegion
+from utils.color_lut import ColorLUT
+from utils.compositing import AlphaCompositor
+from utils.mask_smoother import MaskSmoother
+from utils.mask_upsample import guided_upsample, linear_upsample
+from utils.overlay import Overlay
+from utils.parallel import strip_executor
+from utils.profiler import profiler
+from utils.roi_tracker import RoiTracker
+from utils.text_cache import text_cache
 import config
 
-def draw_text_with_outline(frame, text, position, font_scale=0.8, thickness=2, text_color=(255, 255, 255), outline_color=(0, 0, 0), outline_thickness=4):
-    """Draw text with black outline for better visibility."""
-    font = cv2.FONT_HERSHEY_SIMPLEX
-    # Draw outline
-    cv2.putText(frame, text, position, font, font_scale, outline_color, thickness + outline_thickness, cv2.LINE_AA)
-    # Draw main text
-    cv2.putText(frame, text, position, font, font_scale, text_color, thickness, cv2.LINE_AA)
+# Quality levels for the governor (0 = best). edge_blur caps the user's
+# edge blur setting; boundary toggles the contour smoothing pass.
+CLOAK_QUALITY_LEVELS = [
+    {'kernel': 9, 'iterations': 3, 'history': 7, 'edge_blur': 31, 'boundary': True},
+    {'kernel': 7, 'iterations': 2, 'history': 5, 'edge_blur': 21, 'boundary': True},
+    {'kernel': 7, 'iterations': 2, 'history': 5, 'edge_blur': 15, 'boundary': False},
+    {'kernel': 5, 'iterations': 1, 'history': 3, 'edge_blur': 11, 'boundary': False},
+    {'kernel': 5, 'iterations': 1, 'history': 1, 'edge_blur': 7, 'boundary': False},
+]
+
+def draw_text_with_outline(frame, text, position, font_scale=0.8, thickness=2, text_color=(255, 255, 255), outline_color=(0, 0, 0), outline_thickness=4, cache=True):
+    """Draw text with black outline for better visibility (cache=False for text that changes every frame)."""
+    text_cache.draw(frame, text, position, font_scale, text_color, thickness,
+                    outline_color, thickness + outline_thickness, cache)
 
 class CloakMode(BaseMode):
     def __init__(self):
         # Background capture with multi-frame averaging
         self.background = None
-        self.background_frames = deque(maxlen=30)
         self.is_capturing_background = False
         self.background_capture_count = 0
         self.background_capture_target = 30
+        self.background_estimator = create_background_estimator(self.background_capture_target)
+        self.background_adapter = BackgroundAdapter()  # Follows slow lighting changes
+        self.background_dirty = DirtyRegion()  # Plate rows changed since the last checkpoint
+        self.background_checkpointed = False
+        self.checkpoint_state = None  # Settings as last saved
         
         # Default to config red color ranges
         self.lower_color1 = np.array(config.CLOAK_LOWER_RED1)
@@ -28,6 +49,8 @@ class CloakMode(BaseMode):
         self.lower_color2 = np.array(config.CLOAK_LOWER_RED2)
         self.upper_color2 = np.array(config.CLOAK_UPPER_RED2)
         self.use_dual_range = True
+        self.color_lut = None
+        self._update_color_classifier()
         
         # Click-to-select mode
         self.calibration_mode = False
@@ -35,13 +58,28 @@ class CloakMode(BaseMode):
         self.selected_color = None
         
         # Advanced settings for BEST quality
-        self.mask_history = deque(maxlen=7)  # Increased for even smoother temporal smoothing
+        self.mask_smoother = MaskSmoother()  # Running average of recent masks
+        self.compositor = AlphaCompositor()
+        self.output = None  # Reused every frame
+        self.boundary_blur = None
+        
+        # Mask resolution divisor (1 = full resolution)
+        self.mask_scale = config.CLOAK_MASK_SCALE
+
+        # Only the region around the cloak is processed between full scans
+        self.roi_tracker = RoiTracker(margin=config.CLOAK_ROI_MARGIN // self.mask_scale)
         self.edge_blur_size = 21  # Optimal default for smooth edges
         self.morph_kernel_size = 9  # Larger for better noise removal
         
         # Additional enhancement
         self.background_blur_amount = 0  # Optional background blur for depth effect
         
+        # Quality level (lowered by the governor on slow hardware)
+        self.quality_level = 0
+        self.morph_iterations = 3
+        self.max_edge_blur_size = 31
+        self.boundary_smoothing = True
+        
     def calibrate_from_click(self, frame, x, y):
         """Calibrate color range from clicked point with improved accuracy."""
         hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
@@ -92,25 +130,38 @@ class CloakMode(BaseMode):
                 255
             ])
 
-    def process_frame(self, frame):
+        self._update_color_classifier()
+
+        # New colour range: look for the cloak everywhere again
+        self.roi_tracker.reset()
+
+    def _update_color_classifier(self):
+        """Rebuild the colour lookup table for the current ranges."""
+        if config.CLOAK_COLOR_CLASSIFIER != "lut":
+            self.color_lut = None
+            return
+        ranges = [(self.lower_color1, self.upper_color1)]
+        if self.use_dual_range:
+            ranges.append((self.lower_color2, self.upper_color2))
+        self.color_lut = ColorLUT(ranges)
+
+    def process_frame(self, frame, timestamp=None):
         h, w = frame.shape[:2]
         
         # Handle background capture
         if self.is_capturing_background:
-            self.background_frames.append(frame.copy())
+            self.background_estimator.add(frame)
             self.background_capture_count += 1
             
             result = frame.copy()
             progress = (self.background_capture_count / self.background_capture_target) * 100
             
             # Semi-transparent background for progress UI
-            overlay = result.copy()
-            cv2.rectangle(overlay, (40, 40), (w-40, 160), (0, 0, 0), -1)
-            cv2.addWeighted(overlay, 0.75, result, 0.25, 0, result)
+            Overlay.draw_panel(result, (40, 40), (w-40, 160), (0, 0, 0), 0.75)
             
             # Progress text with outline
             draw_text_with_outline(result, f"Capturing Background: {int(progress)}%", (60, 80), 
-                                  font_scale=0.9, text_color=(0, 255, 255))
+                                  font_scale=0.9, text_color=(0, 255, 255), cache=False)
             draw_text_with_outline(result, "Please stay out of frame!", (60, 120), 
                                   font_scale=0.6, text_color=(255, 255, 255))
             
@@ -125,7 +176,10 @@ class CloakMode(BaseMode):
             cv2.rectangle(result, (bar_x, bar_y), (bar_x + bar_width, bar_y + bar_height), (255, 255, 255), 2)
             
             if self.background_capture_count >= self.background_capture_target:
-                self.background = np.median(np.array(list(self.background_frames)), axis=0).astype(np.uint8)
+                with profiler.stage("cloak.background_median"):
+                    self.background = self.background_estimator.get_background()
+                self.background_adapter.reset(self.background)
+                self.background_dirty.add(0, 0, w, h)
                 self.is_capturing_background = False
                 self.background_capture_count = 0
                 print("✓ Background captured and averaged!")
@@ -136,13 +190,17 @@ class CloakMode(BaseMode):
             
             return result
 
+        # A plate restored from a checkpoint may be from another camera size
+        if self.background is not None and self.background.shape != frame.shape:
+            print("⚠️ Saved background does not match the camera. Press 'B' to capture.")
+            self.background = None
+            self.background_adapter.reset()
+
         if self.background is None:
             result = frame.copy()
             
             # Semi-transparent background for instructions
-            overlay = result.copy()
-            cv2.rectangle(overlay, (30, 50), (w-30, h-50), (0, 0, 0), -1)
-            cv2.addWeighted(overlay, 0.8, result, 0.2, 0, result)
+            Overlay.draw_panel(result, (30, 50), (w-30, h-50), (0, 0, 0), 0.8)
             
             # Title
             draw_text_with_outline(result, "INVISIBILITY CLOAK - BEST MODE", (50, 100),
@@ -172,51 +230,111 @@ class CloakMode(BaseMode):
             return result
 
         # BEST QUALITY Invisibility Effect
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-        
+        # Outside the tracked region the output is the camera frame unchanged
+        if self.output is None or self.output.shape != frame.shape:
+            self.output = np.empty_like(frame)
+            self.boundary_blur = np.empty_like(frame)
+        final_output = self.output
+        np.copyto(final_output, frame)
+
+        # The mask is computed at 1/scale resolution; the ROI is tracked in
+        # mask coordinates and mapped back to full-resolution pixels
+        scale = self.mask_scale
+        mask_shape = (-(-h // scale), -(-w // scale))
+        roi = self.roi_tracker.next_roi(mask_shape)
+        mx0, my0, mx1, my1 = roi
+        x0, y0, x1, y1 = mx0 * scale, my0 * scale, min(w, mx1 * scale), min(h, my1 * scale)
+        frame_roi = frame[y0:y1, x0:x1]
+        output_roi = final_output[y0:y1, x0:x1]
+
+        small_roi = frame_roi
+        if scale > 1:
+            with profiler.stage("cloak.downscale"):
+                small_roi = cv2.resize(frame_roi, (mx1 - mx0, my1 - my0), interpolation=cv2.INTER_AREA)
+
         # Create mask
-        if self.use_dual_range:
-            mask1 = cv2.inRange(hsv, self.lower_color1, self.upper_color1)
-            mask2 = cv2.inRange(hsv, self.lower_color2, self.upper_color2)
-            mask = cv2.bitwise_or(mask1, mask2)
+        if self.color_lut is not None:
+            with profiler.stage("cloak.color_lut"):
+                mask = self.color_lut.classify(small_roi)
         else:
-            mask = cv2.inRange(hsv, self.lower_color1, self.upper_color1)
+            with profiler.stage("cloak.hsv"):
+                hsv = cv2.cvtColor(small_roi, cv2.COLOR_BGR2HSV)
+            
+            with profiler.stage("cloak.in_range"):
+                if self.use_dual_range:
+                    mask1 = cv2.inRange(hsv, self.lower_color1, self.upper_color1)
+                    mask2 = cv2.inRange(hsv, self.lower_color2, self.upper_color2)
+                    mask = cv2.bitwise_or(mask1, mask2)
+                else:
+                    mask = cv2.inRange(hsv, self.lower_color1, self.upper_color1)
 
         # Enhanced morphological operations
-        kernel = np.ones((self.morph_kernel_size, self.morph_kernel_size), np.uint8)
-        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel, iterations=3)
-        mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel, iterations=3)
-        mask = cv2.dilate(mask, kernel, iterations=1)
+        with profiler.stage("cloak.morphology"):
+            kernel_size = self._scaled_size(self.morph_kernel_size)
+            kernel = np.ones((kernel_size, kernel_size), np.uint8)
+            mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel, iterations=self.morph_iterations)
+            mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel, iterations=self.morph_iterations)
+            mask = cv2.dilate(mask, kernel, iterations=1)
         
         # Temporal smoothing
-        self.mask_history.append(mask)
-        if len(self.mask_history) > 1:
-            mask = np.mean(np.array(list(self.mask_history)), axis=0).astype(np.uint8)
+        with profiler.stage("cloak.temporal"):
+            detection = mask
+            mask = self.mask_smoother.push(mask, roi, mask_shape)
+            self.roi_tracker.update(roi, self.mask_smoother.get_support(roi), detection, mask_shape)
         
         # Superior edge feathering
-        mask = cv2.GaussianBlur(mask, (self.edge_blur_size, self.edge_blur_size), 0)
+        with profiler.stage("cloak.feather"):
+            blur_size = self._scaled_size(min(self.edge_blur_size, self.max_edge_blur_size))
+            mask = cv2.GaussianBlur(mask, (blur_size, blur_size), 0)
+            small_mask = mask
+
+        if scale > 1:
+            with profiler.stage("cloak.upsample"):
+                size = (x1 - x0, y1 - y0)
+                if config.CLOAK_MASK_UPSAMPLE == "guided":
+                    mask = guided_upsample(mask, cv2.cvtColor(small_roi, cv2.COLOR_BGR2GRAY),
+                                           cv2.cvtColor(frame_roi, cv2.COLOR_BGR2GRAY))
+                else:
+                    mask = linear_upsample(mask, size)
         
-        # Normalize for alpha blending
-        mask_float = mask.astype(float) / 255.0
-        mask_float_3ch = np.stack([mask_float] * 3, axis=-1)
+        with profiler.stage("cloak.blend"):
+            # Fixed-point alpha blending straight into the output region, in row strips
+            self.compositor.blend(frame_roi, self.background[y0:y1, x0:x1], mask, out=output_roi,
+                                  executor=strip_executor)
         
-        # Alpha blending
-        final_output = (frame * (1 - mask_float_3ch) + self.background * mask_float_3ch).astype(np.uint8)
+        # Advanced boundary smoothing (band found and drawn at mask resolution)
+        with profiler.stage("cloak.boundary"):
+            contours = None
+            if self.boundary_smoothing:
+                contours, _ = cv2.findContours(small_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            if contours:
+                boundary_mask = np.zeros_like(small_mask)
+                cv2.drawContours(boundary_mask, contours, -1, 255, thickness=max(1, 15 // scale))
+                band_blur = self._scaled_size(21)
+                boundary_mask = cv2.GaussianBlur(boundary_mask, (band_blur, band_blur), 0)
+                if scale > 1:
+                    boundary_mask = linear_upsample(boundary_mask, (x1 - x0, y1 - y0))
+                
+                blurred_output = self.boundary_blur[y0:y1, x0:x1]
+                cv2.GaussianBlur(output_roi, (7, 7), 0, dst=blurred_output)
+                self.compositor.blend(output_roi, blurred_output, boundary_mask, out=output_roi,
+                                      executor=strip_executor)
         
-        # Advanced boundary smoothing
-        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        if contours:
-            boundary_mask = np.zeros_like(mask)
-            cv2.drawContours(boundary_mask, contours, -1, 255, thickness=15)
-            boundary_mask = cv2.GaussianBlur(boundary_mask, (21, 21), 0)
-            
-            blurred_output = cv2.GaussianBlur(final_output, (7, 7), 0)
-            boundary_blend = boundary_mask.astype(float) / 255.0
-            boundary_blend_3ch = np.stack([boundary_blend] * 3, axis=-1)
-            final_output = (final_output * (1 - boundary_blend_3ch) + blurred_output * boundary_blend_3ch).astype(np.uint8)
+        # Refresh one strip of the plate from pixels outside the cloak
+        rows = self.background_adapter.next_strip(mask_shape[0])
+        if rows is not None:
+            with profiler.stage("cloak.background_adapt"):
+                my0, my1 = rows
+                exclude = self.mask_smoother.get_support((0, my0, mask_shape[1], my1))
+                y0, y1 = my0 * scale, min(h, my1 * scale)
+                if scale > 1:
+                    exclude = cv2.resize(exclude, (w, y1 - y0), interpolation=cv2.INTER_NEAREST)
+                self.background_adapter.update(frame, self.background, (y0, y1), exclude)
+                self.background_dirty.add(0, y0, w, y1)
         
         # Draw professional UI
-        self._draw_ui(final_output, mask)
+        with profiler.stage("cloak.ui"):
+            self._draw_ui(final_output, small_mask)
         
         return final_output
     
@@ -225,9 +343,7 @@ class CloakMode(BaseMode):
         h, w = frame.shape[:2]
         
         # Top status bar
-        overlay = frame.copy()
-        cv2.rectangle(overlay, (0, 0), (w, 110), (0, 0, 0), -1)
-        cv2.addWeighted(overlay, 0.7, frame, 0.3, 0, frame)
+        Overlay.draw_panel(frame, (0, 0), (w, 110), (0, 0, 0), 0.7)
         
         if self.calibration_mode:
             draw_text_with_outline(frame, "CALIBRATION MODE", (20, 40),
@@ -243,10 +359,11 @@ class CloakMode(BaseMode):
             draw_text_with_outline(frame, "INVISIBILITY ACTIVE", (20, 40),
                                   font_scale=1.0, text_color=(0, 255, 0))
             
-            # Coverage and quality indicators
-            coverage = (np.sum(mask > 128) / (h * w)) * 100
+            # Coverage and quality indicators (mask is at 1/mask_scale resolution)
+            mask_pixels = np.count_nonzero(mask > 128) * self.mask_scale * self.mask_scale
+            coverage = min(100.0, (mask_pixels / (h * w)) * 100)
             draw_text_with_outline(frame, f"Cloak Coverage: {coverage:.1f}%", (20, 75),
-                                  font_scale=0.6, text_color=(255, 255, 255))
+                                  font_scale=0.6, text_color=(255, 255, 255), cache=False)
             
             # Color swatch
             if self.selected_color is not None:
@@ -257,9 +374,7 @@ class CloakMode(BaseMode):
                                       font_scale=0.4, text_color=(255, 255, 255), thickness=1)
         
         # Bottom control bar
-        overlay = frame.copy()
-        cv2.rectangle(overlay, (0, h-40), (w, h), (0, 0, 0), -1)
-        cv2.addWeighted(overlay, 0.7, frame, 0.3, 0, frame)
+        Overlay.draw_panel(frame, (0, h-40), (w, h), (0, 0, 0), 0.7)
         
         draw_text_with_outline(frame, "[B] Background  [T] Calibrate  [X] Reset  [+/-] Edge Blur", 
                               (20, h-15), font_scale=0.5, text_color=(255, 255, 255), thickness=1)
@@ -268,7 +383,8 @@ class CloakMode(BaseMode):
         if key == ord('b') or key == ord('B'):
             self.is_capturing_background = True
             self.background_capture_count = 0
-            self.background_frames.clear()
+            self.background_estimator.reset()
+            self.roi_tracker.reset()
             print("➜ Starting background capture (30 frames)...")
             
         elif key == ord('t') or key == ord('T'):
@@ -280,9 +396,11 @@ class CloakMode(BaseMode):
                 
         elif key == ord('x') or key == ord('X'):
             self.background = None
-            self.background_frames.clear()
+            self.background_estimator.reset()
+            self.background_adapter.reset()
             self.selected_color = None
-            self.mask_history.clear()
+            self.mask_smoother.reset()
+            self.roi_tracker.reset()
             print("➜ Reset complete.")
             
         elif key == ord('+') or key == ord('='):
@@ -303,6 +421,68 @@ class CloakMode(BaseMode):
             self.calibrate_from_click(frame, x, y)
             self.calibration_mode = False
 
+    def save_checkpoint(self, store):
+        """Save the calibration, and the plate rows changed since the last save."""
+        state = {
+            'selected_color': None if self.selected_color is None else self.selected_color.tolist(),
+            'use_dual_range': self.use_dual_range,
+            'ranges': [c.tolist() for c in (self.lower_color1, self.upper_color1,
+                                            self.lower_color2, self.upper_color2)],
+            'edge_blur_size': self.edge_blur_size,
+        }
+        if state != self.checkpoint_state:
+            store.save_state('cloak', state)
+            self.checkpoint_state = state
+
+        if self.background is None:
+            if self.background_checkpointed:
+                store.remove_array('cloak', 'background')
+                self.background_checkpointed = False
+            self.background_dirty.clear()
+            return
+        rect = self.background_dirty.clipped(self.background.shape)
+        if rect is not None:
+            store.update_array('cloak', 'background', self.background, rect)
+            self.background_dirty.clear()
+            self.background_checkpointed = True
+
+    def restore_checkpoint(self, store):
+        """Restore the calibration and background plate, skipping capture."""
+        state = store.load_state('cloak')
+        if state is not None:
+            if state['selected_color'] is not None:
+                self.selected_color = np.array(state['selected_color'], dtype=np.uint8)
+            self.use_dual_range = state['use_dual_range']
+            self.lower_color1, self.upper_color1, self.lower_color2, self.upper_color2 = (
+                np.array(c) for c in state['ranges'])
+            self.edge_blur_size = state['edge_blur_size']
+            self.checkpoint_state = state
+            self._update_color_classifier()
+
+        background = store.load_array('cloak', 'background')
+        if background is not None:
+            self.background = background
+            self.background_adapter.reset(background)
+            self.background_checkpointed = True
+            print("✓ Restored background and calibration from checkpoint")
+
+    def _scaled_size(self, size):
+        """Odd kernel size equivalent to `size` full-resolution pixels at mask resolution."""
+        size = max(1, int(round(size / self.mask_scale)))
+        return size if size % 2 == 1 else size + 1
+
+    def get_quality_levels(self):
+        return len(CLOAK_QUALITY_LEVELS)
+
+    def set_quality_level(self, level):
+        settings = CLOAK_QUALITY_LEVELS[level]
+        self.quality_level = level
+        self.morph_kernel_size = settings['kernel']
+        self.morph_iterations = settings['iterations']
+        self.max_edge_blur_size = settings['edge_blur']
+        self.boundary_smoothing = settings['boundary']
+        self.mask_smoother.set_window(min(settings['history'], config.CLOAK_TEMPORAL_WINDOW))
+
     def get_name(self):
         return ""
 
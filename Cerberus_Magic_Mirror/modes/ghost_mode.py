@@ -1,24 +1,33 @@
 import cv2
 import numpy as np
 from .base_mode import BaseMode
+from utils.parallel import strip_executor
+from utils.profiler import profiler
 import config
 
 class GhostMode(BaseMode):
     def __init__(self):
         self.accumulated_frame = None
+        self.output = None  # Reused every frame
         self.alpha = config.GHOST_DEFAULT_ALPHA  # Blending factor from config
 
-    def process_frame(self, frame):
+    def process_frame(self, frame, timestamp=None):
+        # The first frame starts the average (and is output as is)
         if self.accumulated_frame is None:
             self.accumulated_frame = frame.astype("float")
-            return frame
 
-        # Calculate weighted average
-        cv2.accumulateWeighted(frame, self.accumulated_frame, self.alpha)
-        
-        # Convert back to uint8
-        result = cv2.convertScaleAbs(self.accumulated_frame)
-        return result
+        if self.output is None or self.output.shape != frame.shape:
+            self.output = np.empty_like(frame)
+        accumulated, output, alpha = self.accumulated_frame, self.output, self.alpha
+
+        # Calculate weighted average and convert back to uint8, in row strips
+        def accumulate_rows(y0, y1, *_):
+            cv2.accumulateWeighted(frame[y0:y1], accumulated[y0:y1], alpha)
+            cv2.convertScaleAbs(accumulated[y0:y1], dst=output[y0:y1])
+
+        with profiler.stage("ghost.accumulate"):
+            strip_executor.run(accumulate_rows, frame.shape[0])
+        return output
 
     def handle_input(self, key):
         # Increase alpha (more ghosting)
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""Tests for mode checkpoints (incremental stroke log, background writer)"""
+import os
+import sys
+import tempfile
+import numpy as np
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.checkpoint import CheckpointStore, CheckpointWriter
+from utils.strokes import StrokeStore
+
+def draw(store, rng, count=20):
+    """Draw a finished stroke through random points."""
+    stroke = store.begin(tuple(rng.integers(0, 640, 2).tolist()), (1, 2, 3), 5)
+    for _ in range(count - 1):
+        store.extend(stroke, tuple(rng.integers(0, 640, 2).tolist()))
+    store.end(stroke)
+    return stroke
+
+def restored(store):
+    strokes = StrokeStore()
+    assert strokes.restore_checkpoint(store, 'paint')
+    return strokes
+
+def assert_same(a, b):
+    assert sorted(a.strokes) == sorted(b.strokes)
+    for stroke_id, stroke in a.strokes.items():
+        other = b.strokes[stroke_id]
+        assert np.array_equal(stroke.coords, other.coords)
+        assert (stroke.color, stroke.width) == (other.color, other.width)
+    # Restored strokes are indexed for the eraser
+    for stroke in a.strokes.values():
+        point = tuple(stroke.coords[0].tolist())
+        assert stroke.id in [s.id for s in b.hit_test(point, 1)]
+
+def file_size(directory, key):
+    return os.path.getsize(os.path.join(directory, 'paint', f"{key}.npy"))
+
+def check_round_trips(directory, store, reader):
+    """Save through store, flush, and restore through reader after each change."""
+    flush = getattr(store, 'flush', lambda: None)
+    rng = np.random.default_rng(0)
+    strokes = StrokeStore()
+
+    def save_and_check():
+        strokes.save_checkpoint(store, 'paint')
+        flush()
+        assert_same(strokes, restored(reader))
+
+    for _ in range(5):
+        draw(strokes, rng)
+    save_and_check()
+
+    # A new stroke is appended: the point log grows by its points only
+    before = file_size(directory, 'stroke_points')
+    draw(strokes, rng, count=30)
+    save_and_check()
+    assert file_size(directory, 'stroke_points') - before == 30 * 2 * 4
+
+    # Erase, undo and redo only change the hidden list
+    strokes.erase([strokes.strokes[1]])
+    save_and_check()
+    strokes.undo()
+    save_and_check()
+    strokes.undo()
+    save_and_check()
+    strokes.redo()
+    save_and_check()
+
+    # A stroke still being drawn is left out until it is finished
+    current = strokes.begin((5, 5), (0, 0, 0), 3)
+    strokes.extend(current, (9, 9))
+    strokes.save_checkpoint(store, 'paint', before=current.id)
+    flush()
+    assert current.id not in restored(reader).strokes
+    strokes.extend(current, (15, 15))
+    strokes.end(current)
+    save_and_check()
+
+    # A restored store keeps appending with fresh ids
+    strokes = restored(reader)
+    stroke = draw(strokes, rng)
+    assert stroke.id == max(strokes.strokes)
+    save_and_check()
+
+    # Clearing compacts the log
+    strokes.clear()
+    save_and_check()
+    assert len(np.load(os.path.join(directory, 'paint', 'stroke_points.npy'))) == 0
+
+def test_stroke_log_round_trip():
+    with tempfile.TemporaryDirectory() as directory:
+        store = CheckpointStore(directory)
+        check_round_trips(directory, store, store)
+
+def test_stroke_log_round_trip_through_writer():
+    with tempfile.TemporaryDirectory() as directory:
+        store = CheckpointStore(directory)
+        writer = CheckpointWriter(store)
+        try:
+            check_round_trips(directory, writer, store)
+        finally:
+            writer.stop()
+
+def test_interrupted_append_forces_rewrite():
+    with tempfile.TemporaryDirectory() as directory:
+        store = CheckpointStore(directory)
+        rng = np.random.default_rng(2)
+        strokes = StrokeStore()
+        for _ in range(3):
+            draw(strokes, rng)
+        strokes.save_checkpoint(store, 'paint')
+
+        # Points appended without their meta rows (e.g. a crash in between)
+        store.append_array('paint', 'stroke_points', np.zeros((7, 2), dtype=np.int32))
+        strokes = restored(store)
+        assert len(strokes) == 3 and not strokes.log_valid
+
+        draw(strokes, rng)
+        strokes.save_checkpoint(store, 'paint')
+        assert strokes.log_valid
+        assert_same(strokes, restored(store))
+
+def test_writer_rewrites_after_failed_in_place_write():
+    with tempfile.TemporaryDirectory() as directory:
+        store = CheckpointStore(directory)
+        writer = CheckpointWriter(store)
+        try:
+            rows = np.zeros((3, 2), dtype=np.int32)
+            writer.save_array('m', 'rows', rows)
+            writer.flush()
+            os.remove(os.path.join(directory, 'm', 'rows.npy'))
+            # Queued before the worker finds the file gone, then refused
+            assert writer.append_array('m', 'rows', rows)
+            writer.flush()
+            assert not writer.append_array('m', 'rows', rows)
+
+            image = np.zeros((4, 4), dtype=np.uint8)
+            writer.save_array('m', 'image', image)
+            writer.flush()
+            os.remove(os.path.join(directory, 'm', 'image.npy'))
+            image[1, 1] = 7
+            writer.update_array('m', 'image', image, (1, 1, 2, 2))
+            writer.flush()
+            image[2, 2] = 9
+            writer.update_array('m', 'image', image, (2, 2, 3, 3))
+            writer.flush()
+            assert np.array_equal(store.load_array('m', 'image'), image)
+        finally:
+            writer.stop()
+
+def test_writer_copies_before_returning():
+    with tempfile.TemporaryDirectory() as directory:
+        store = CheckpointStore(directory)
+        writer = CheckpointWriter(store)
+        try:
+            image = np.zeros((8, 8), dtype=np.uint8)
+            writer.save_array('m', 'image', image)
+            writer.flush()
+            image[:] = 5
+            writer.update_array('m', 'image', image, (0, 0, 8, 8))
+            image[:] = 9  # Changed before the worker may have written
+            writer.flush()
+            assert (store.load_array('m', 'image') == 5).all()
+        finally:
+            writer.stop()
+
+if __name__ == "__main__":
+    tests = [(name, test) for name, test in sorted(globals().items()) if name.startswith("test_")]
+    failed = 0
+    for name, test in tests:
+        try:
+            test()
+            print(f"   ✓ {name}")
+        except Exception as e:
+            failed += 1
+            print(f"   ✗ {name}: {e!r}")
+    sys.exit(1 if failed else 0)
@@ -1,10 +1,11 @@
 #!/usr/bin/env python3
 """Quick diagnostic to test modes"""
 import cv2
+import os
 import sys
-sys.path.insert(0, '/home/cerberusmrxi/Desktop/New Folder/Cerberus_Magic_Mirror')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from modes.advanced_paint_mode import AdvancedPaintMode
+from modes.air_draw_mode import ARPaintMode
 from modes.cloak_mode import CloakMode
 
 print("="*60)
@@ -12,9 +13,9 @@ print("MODE DIAGNOSTIC TEST")
 print("="*60)
 
 # Test Paint Mode
-print("\n1. Testing Advanced Paint Mode...")
+print("\n1. Testing AR Paint Mode...")
 try:
-    paint_mode = AdvancedPaintMode()
+    paint_mode = ARPaintMode()
     print(f"   ✓ Paint mode created")
     print(f"   ✓ Name: {paint_mode.get_name()}")
     print(f"   ✓ Controls: {paint_mode.get_controls()}")
@@ -33,7 +34,27 @@ try:
 except Exception as e:
     print(f"   ✗ Error: {e}")
 
-print("\n3. Testing main.py imports...")
+print("\n3. Testing fixed-point compositing...")
+try:
+    import numpy as np
+    from utils.compositing import AlphaCompositor
+    rng = np.random.default_rng(0)
+    fg = rng.integers(0, 256, (480, 640, 3), dtype=np.uint8)
+    bg = rng.integers(0, 256, (480, 640, 3), dtype=np.uint8)
+    mask = rng.integers(0, 256, (480, 640), dtype=np.uint8)
+    # Float reference the fixed-point blend replaced (truncating)
+    alpha = mask.astype(float)[..., None] / 255.0
+    reference = (fg * (1 - alpha) + bg * alpha).astype(np.uint8)
+    result = AlphaCompositor().blend(fg, bg, mask)
+    max_diff = int(np.abs(result.astype(int) - reference).max())
+    if max_diff <= 1:
+        print(f"   ✓ Blend matches float reference (max diff {max_diff})")
+    else:
+        print(f"   ✗ Blend differs from float reference by {max_diff} levels")
+except Exception as e:
+    print(f"   ✗ Error: {e}")
+
+print("\n4. Testing main.py imports...")
 try:
     from main import main
     print("   ✓ main.py imports successfully")
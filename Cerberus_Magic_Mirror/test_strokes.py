@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""Tests for the paint stroke store (undo/redo, erasing, hit testing)"""
+import os
+import sys
+import numpy as np
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.strokes import StrokeStore
+
+COLOR = (0, 255, 0)
+
+def draw(store, points, width=4):
+    """Draw a finished stroke through points."""
+    stroke = store.begin(points[0], COLOR, width)
+    for point in points[1:]:
+        store.extend(stroke, point)
+    store.end(stroke)
+    return stroke
+
+def tap(store, point):
+    """A single-point stroke, which end() drops."""
+    stroke = store.begin(point, COLOR, 4)
+    store.end(stroke)
+    return stroke
+
+def test_tap_keeps_redo_history():
+    store = StrokeStore()
+    a = draw(store, [(10, 10), (50, 10)])
+    store.undo()
+    assert a.id not in store.strokes
+
+    t = tap(store, (100, 100))
+    assert t.id not in store.strokes
+    assert store.redo() is not None
+    assert list(store.strokes) == [a.id]
+
+    # Undo after the dropped tap undoes the stroke, not the tap
+    store.undo()
+    assert len(store) == 0
+
+def test_new_stroke_clears_redo_history():
+    store = StrokeStore()
+    draw(store, [(10, 10), (50, 10)])
+    store.undo()
+    b = draw(store, [(10, 30), (50, 30)])
+    assert store.redo() is None
+    assert list(store.strokes) == [b.id]
+
+def test_undo_restores_merged_erase():
+    store = StrokeStore()
+    a = draw(store, [(10, 10), (50, 10)])
+    b = draw(store, [(10, 30), (50, 30)])
+    c = draw(store, [(10, 50), (50, 50)])
+
+    # One continuous eraser gesture over a, then b
+    assert store.erase(store.hit_test((30, 10), 5)) is not None
+    assert store.erase(store.hit_test((30, 30), 5), merge=True) is not None
+    assert list(store.strokes) == [c.id]
+
+    # A single undo brings both back, indexed for hit testing again
+    store.undo()
+    assert sorted(store.strokes) == [a.id, b.id, c.id]
+    assert store.hit_test((30, 10), 5) == [a]
+    assert store.hit_test((30, 30), 5) == [b]
+
+    store.redo()
+    assert list(store.strokes) == [c.id]
+    assert store.hit_test((30, 10), 5) == []
+
+def test_erase_without_merge_is_undone_separately():
+    store = StrokeStore()
+    a = draw(store, [(10, 10), (50, 10)])
+    b = draw(store, [(10, 30), (50, 30)])
+    store.erase([a])
+    store.erase([b])
+    store.undo()
+    assert list(store.strokes) == [b.id]
+
+def reference_hits(store, point, radius):
+    """hit_test() without the grid: check every visible stroke."""
+    p = np.array(point, dtype=np.float64)
+    hits = []
+    for stroke_id in sorted(store.strokes):
+        stroke = store.strokes[stroke_id]
+        pts = stroke.coords.astype(np.float64)
+        if len(pts) == 1:
+            dist = np.hypot(*(pts[0] - p))
+        else:
+            dists = []
+            for a, b in zip(pts[:-1], pts[1:]):
+                ab = b - a
+                t = np.clip(np.dot(p - a, ab) / max(np.dot(ab, ab), 1e-6), 0, 1)
+                dists.append(np.hypot(*(a + ab * t - p)))
+            dist = min(dists)
+        # Same tolerance as hit_test's float32 arithmetic
+        if dist <= radius + stroke.width / 2 + 1e-3:
+            hits.append(stroke_id)
+    return hits
+
+def test_hit_test_matches_scan_across_cell_boundaries():
+    rng = np.random.default_rng(1)
+    store = StrokeStore(cell_size=16)
+    for _ in range(40):
+        n = int(rng.integers(2, 6))
+        points = [tuple(int(v) for v in rng.integers(-40, 120, 2)) for _ in range(n)]
+        draw(store, points, width=int(rng.integers(1, 9)))
+    store.erase(list(store.strokes.values())[::5])
+
+    # Query on and around cell edges (multiples of 16), including negative cells
+    edges = np.arange(-48, 129, 16)
+    coords = np.concatenate([edges - 1, edges, edges + 1])
+    for _ in range(2000):
+        x, y = (int(rng.choice(coords)) if rng.random() < 0.5 else int(rng.integers(-50, 130))
+                for _ in range(2))
+        radius = float(rng.choice([0.5, 3, 8, 20]))
+        hits = [s.id for s in store.hit_test((x, y), radius)]
+        assert hits == reference_hits(store, (x, y), radius), (x, y, radius)
+
+def test_hit_test_segment_ending_on_cell_edge():
+    store = StrokeStore(cell_size=64)
+    stroke = draw(store, [(0, 10), (63, 10)], width=2)
+    # Reach is radius + width / 2 = 4 px past the end, into the next cell
+    assert store.hit_test((67, 10), 3) == [stroke]
+    assert store.hit_test((68, 10), 2.9) == []
+    # Just across the edge above and below
+    assert store.hit_test((32, 14), 3) == [stroke]
+    assert store.hit_test((32, -3), 3) == []
+
+if __name__ == "__main__":
+    tests = [(name, test) for name, test in sorted(globals().items()) if name.startswith("test_")]
+    failed = 0
+    for name, test in tests:
+        try:
+            test()
+            print(f"   ✓ {name}")
+        except Exception as e:
+            failed += 1
+            print(f"   ✗ {name}: {e!r}")
+    sys.exit(1 if failed else 0)
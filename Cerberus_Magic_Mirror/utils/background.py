@@ -0,0 +1,224 @@
+# Cerberus Magic Mirror - Background Plate Utility
+# Author: Sudeepa Wanigarathna
+
+import cv2
+import numpy as np
+import config
+
+class MedianBackgroundEstimator:
+    """
+    Exact per-pixel median of a fixed number of frames, computed as they arrive.
+
+    Each new frame is merged into a per-pixel sorted list with cv2.min/max
+    compare-exchanges. Only the smallest num_frames // 2 + 2 values per pixel
+    can still become the median, so that is all that is stored; the rest
+    fall off the end. The result is identical to
+    np.median(frames, axis=0).astype(np.uint8), with no stacking or float
+    copies, and reading it at the end of capture costs one frame copy.
+    """
+
+    def __init__(self, num_frames):
+        self.num_frames = num_frames
+        self.depth = num_frames // 2 + 2
+        self.slots = []
+        self.spare = None
+        self.incoming = None
+        self.count = 0
+
+    def reset(self):
+        """Forget collected frames (buffers are kept for the next capture)."""
+        self.count = 0
+
+    def add(self, frame):
+        """Merge one frame into the running sorted lists."""
+        if self.slots and self.slots[0].shape != frame.shape:
+            self.slots = []
+            self.spare = None
+            self.incoming = None
+        if self.incoming is None:
+            self.incoming = np.empty_like(frame)
+            self.spare = np.empty_like(frame)
+
+        new = self.incoming
+        np.copyto(new, frame)
+
+        filled = min(self.count, self.depth)
+        for i in range(filled):
+            # slots[i] <- min(slots[i], new), new <- max(slots[i], new)
+            cv2.min(self.slots[i], new, dst=self.spare)
+            cv2.max(self.slots[i], new, dst=new)
+            self.slots[i], self.spare = self.spare, self.slots[i]
+
+        if filled < self.depth:
+            if filled < len(self.slots):
+                self.slots[filled], self.incoming = new, self.slots[filled]
+            else:
+                self.slots.append(new)
+                self.incoming = np.empty_like(frame)
+        self.count += 1
+
+    def get_background(self):
+        """
+        Median of the frames added so far.
+
+        Returns:
+            numpy.ndarray: uint8 background plate, or None if no frames were added
+        """
+        if self.count == 0:
+            return None
+
+        k = self.count // 2
+        if self.count % 2 == 1:
+            return self.slots[k].copy()
+
+        # Even count: floor of the mean of the two middle values, without overflow
+        low, high = self.slots[k - 1], self.slots[k]
+        background = (low >> 1) + (high >> 1)
+        background += low & high & 1
+        return background
+
+class ApproxMedianBackgroundEstimator:
+    """
+    Approximate per-pixel median using a single int16 estimate.
+
+    Every frame moves the estimate toward the frame by at most a step that
+    shrinks as capture progresses, so brief intruders (someone crossing the
+    frame) pull it only slightly. Uses one frame of storage regardless of
+    the number of frames.
+    """
+
+    def __init__(self, num_frames):
+        self.num_frames = num_frames
+        self.estimate = None
+        self.delta = None
+        self.count = 0
+
+    def reset(self):
+        """Forget collected frames."""
+        self.count = 0
+
+    def add(self, frame):
+        """Move the estimate toward one frame."""
+        if self.estimate is None or self.estimate.shape != frame.shape:
+            self.estimate = np.empty(frame.shape, dtype=np.int16)
+            self.delta = np.empty(frame.shape, dtype=np.int16)
+
+        if self.count == 0:
+            np.copyto(self.estimate, frame)
+        else:
+            step = max(1, 64 // self.count)
+            np.subtract(frame, self.estimate, out=self.delta, dtype=np.int16)
+            np.clip(self.delta, -step, step, out=self.delta)
+            self.estimate += self.delta
+        self.count += 1
+
+    def get_background(self):
+        """
+        Current estimate.
+
+        Returns:
+            numpy.ndarray: uint8 background plate, or None if no frames were added
+        """
+        if self.count == 0:
+            return None
+        return self.estimate.astype(np.uint8)
+
+class BackgroundAdapter:
+    """
+    Keeps a captured background plate current under slow lighting changes.
+
+    Every `interval` frames one horizontal strip of the plate is blended
+    toward the live frame with cv2.accumulateWeighted, so the whole plate
+    is refreshed once every interval * strips frames for a small fraction
+    of a frame's work each time. Only pixels that look like background are
+    blended: pixels the caller excludes (the cloak) and pixels differing
+    from the plate by more than `threshold` in any channel (people and
+    other foreground) keep their value. A sudden change such as lights
+    switching on exceeds the threshold everywhere and still needs a
+    re-capture.
+    """
+
+    def __init__(self, rate=None, interval=None, strips=None, threshold=None, enabled=None):
+        self.rate = rate or config.CLOAK_BACKGROUND_ADAPT_RATE
+        self.interval = interval or config.CLOAK_BACKGROUND_ADAPT_INTERVAL
+        self.strips = strips or config.CLOAK_BACKGROUND_ADAPT_STRIPS
+        self.threshold = config.CLOAK_BACKGROUND_ADAPT_THRESHOLD if threshold is None else threshold
+        self.enabled = config.CLOAK_BACKGROUND_ADAPT if enabled is None else enabled
+        self.plate = None
+        self.frame_count = 0
+        self.strip = 0
+        self.updates = 0
+
+    def reset(self, background=None):
+        """
+        Start adapting a new plate, or stop when background is None.
+
+        Args:
+            background: uint8 plate that update() will modify in place
+        """
+        self.plate = None if background is None else background.astype(np.float32)
+        self.frame_count = 0
+        self.strip = 0
+
+    def next_strip(self, height):
+        """
+        Rows to update this frame.
+
+        Args:
+            height: Number of rows the strips divide
+
+        Returns:
+            tuple: (y0, y1), or None if no update is due
+        """
+        if not self.enabled or self.plate is None:
+            return None
+        self.frame_count += 1
+        if self.frame_count % self.interval:
+            return None
+
+        y0 = self.strip * height // self.strips
+        y1 = (self.strip + 1) * height // self.strips
+        self.strip = (self.strip + 1) % self.strips
+        return y0, y1
+
+    def update(self, frame, background, rows, exclude=None):
+        """
+        Blend background-looking pixels of one strip into the plate.
+
+        Args:
+            frame: Live BGR frame
+            background: The uint8 plate given to reset(), updated in place
+            rows: (y0, y1) from next_strip()
+            exclude: Optional uint8 mask for the strip, nonzero = never update
+        """
+        y0, y1 = rows
+        live = frame[y0:y1]
+        current = background[y0:y1]
+
+        limit = (self.threshold,) * 3
+        valid = cv2.inRange(cv2.absdiff(live, current), (0, 0, 0), limit)
+        if exclude is not None:
+            cv2.bitwise_and(valid, cv2.bitwise_not(exclude), dst=valid)
+
+        plate = self.plate[y0:y1]
+        cv2.accumulateWeighted(live, plate, self.rate, mask=valid)
+        cv2.convertScaleAbs(plate, dst=current)
+        self.updates += 1
+
+BACKGROUND_ESTIMATORS = {
+    'median': MedianBackgroundEstimator,
+    'approx': ApproxMedianBackgroundEstimator,
+}
+
+def create_background_estimator(num_frames, kind=None):
+    """
+    Build a background estimator.
+
+    Args:
+        num_frames: Number of frames the capture will collect
+        kind: "median" (exact) or "approx" (defaults to config.CLOAK_BACKGROUND_ESTIMATOR)
+    """
+    kind = kind or config.CLOAK_BACKGROUND_ESTIMATOR
+    if kind not in BACKGROUND_ESTIMATORS:
+        raise ValueError(f"Unknown background estimator: {kind}")
+    return BACKGROUND_ESTIMATORS[kind](num_frames)
@@ -0,0 +1,136 @@
+# Cerberus Magic Mirror - Threaded Capture Utility
+# Author: Sudeepa Wanigarathna
+
+import threading
+import time
+from collections import deque
+import config
+
+class ThreadedCapture:
+    """
+    Reads frames on a dedicated thread so camera I/O overlaps with processing.
+
+    Frames land in a small ring buffer. The consumer always receives the
+    newest frame; anything older that it never picked up is counted as dropped.
+    With drop_frames=False the buffer is a FIFO instead and the capture thread
+    waits for free space, so recorded input is replayed frame by frame.
+    """
+
+    def __init__(self, source, buffer_size=None, drop_frames=True):
+        """
+        Args:
+            source: Object with read() -> (ret, frame) and release(), e.g. a FrameSource
+            buffer_size: Number of frames kept in the ring buffer
+            drop_frames: Always deliver the newest frame (live input)
+        """
+        self.source = source
+        self.drop_frames = drop_frames
+        self.buffer = deque(maxlen=buffer_size or config.CAPTURE_BUFFER_SIZE)
+        self.frame_ready = threading.Condition()
+        self.thread = None
+        self.is_running = False
+
+        # Statistics
+        self.frames_captured = 0
+        self.frames_delivered = 0
+        self.frames_dropped = 0
+        self.last_frame_age = 0.0
+        self.total_frame_age = 0.0
+
+    def start(self):
+        """Start the capture thread."""
+        if self.is_running:
+            return self
+
+        self.is_running = True
+        self.thread = threading.Thread(target=self._capture_loop, name="CaptureThread", daemon=True)
+        self.thread.start()
+        return self
+
+    def _capture_loop(self):
+        """Pull frames from the source until stopped or the source fails."""
+        while self.is_running:
+            ret, frame = self.source.read()
+            timestamp = time.time()
+
+            with self.frame_ready:
+                if not ret:
+                    self.is_running = False
+                    self.frame_ready.notify_all()
+                    break
+
+                if not self.drop_frames:
+                    self.frame_ready.wait_for(
+                        lambda: len(self.buffer) < self.buffer.maxlen or not self.is_running)
+                    if not self.is_running:
+                        break
+
+                # Ring buffer full: the oldest frame is overwritten unseen
+                if len(self.buffer) == self.buffer.maxlen:
+                    self.frames_dropped += 1
+
+                self.buffer.append((frame, timestamp))
+                self.frames_captured += 1
+                self.frame_ready.notify_all()
+
+    def read(self, timeout=None):
+        """
+        Get the newest captured frame (oldest when not dropping frames),
+        waiting for one if none is pending.
+
+        Args:
+            timeout: Maximum seconds to wait (defaults to config.CAPTURE_READ_TIMEOUT)
+
+        Returns:
+            tuple: (ret, frame, timestamp) where timestamp is the capture time
+        """
+        if timeout is None:
+            timeout = config.CAPTURE_READ_TIMEOUT
+
+        with self.frame_ready:
+            if not self.buffer and self.is_running:
+                self.frame_ready.wait_for(lambda: self.buffer or not self.is_running, timeout)
+
+            if not self.buffer:
+                return False, None, None
+
+            if self.drop_frames:
+                frame, timestamp = self.buffer.pop()
+                self.frames_dropped += len(self.buffer)
+                self.buffer.clear()
+            else:
+                frame, timestamp = self.buffer.popleft()
+                self.frame_ready.notify_all()
+            self.frames_delivered += 1
+
+        self.last_frame_age = time.time() - timestamp
+        self.total_frame_age += self.last_frame_age
+        return True, frame, timestamp
+
+    def get_stats(self):
+        """
+        Get capture statistics.
+
+        Returns:
+            dict: Frame counters and frame age (seconds between capture and delivery)
+        """
+        avg_age = self.total_frame_age / self.frames_delivered if self.frames_delivered else 0.0
+        return {
+            'captured': self.frames_captured,
+            'delivered': self.frames_delivered,
+            'dropped': self.frames_dropped,
+            'last_frame_age': self.last_frame_age,
+            'avg_frame_age': avg_age
+        }
+
+    def stop(self):
+        """Stop the capture thread and release the source."""
+        with self.frame_ready:
+            self.is_running = False
+            self.frame_ready.notify_all()
+
+        if self.thread is not None:
+            self.thread.join(timeout=config.CAPTURE_READ_TIMEOUT)
+            self.thread = None
+
+        self.source.release()
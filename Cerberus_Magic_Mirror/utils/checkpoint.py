@@ -0,0 +1,388 @@
+# Cerberus Magic Mirror - Mode State Checkpoint Utility
+# Author: Sudeepa Wanigarathna
+
+import copy
+import io
+import json
+import os
+import threading
+import time
+from collections import deque
+import numpy as np
+import config
+from utils.logger import logger
+
+class DirtyRegion:
+    """
+    Bounding box of the pixels changed since it was last cleared.
+
+    Rectangles are (x0, y0, x1, y1) with exclusive x1/y1.
+    """
+
+    def __init__(self):
+        self.rect = None
+
+    def add(self, x0, y0, x1, y1):
+        """Grow the region to include a rectangle."""
+        if self.rect is None:
+            self.rect = (x0, y0, x1, y1)
+        else:
+            rx0, ry0, rx1, ry1 = self.rect
+            self.rect = (min(rx0, x0), min(ry0, y0), max(rx1, x1), max(ry1, y1))
+
+    def clear(self):
+        """Mark everything clean."""
+        self.rect = None
+
+    def clipped(self, shape):
+        """
+        The region clipped to an image.
+
+        Returns:
+            tuple: (x0, y0, x1, y1), or None if nothing inside the image changed
+        """
+        if self.rect is None:
+            return None
+        h, w = shape[:2]
+        x0, y0, x1, y1 = self.rect
+        x0, y0, x1, y1 = max(0, x0), max(0, y0), min(w, x1), min(h, y1)
+        if x0 >= x1 or y0 >= y1:
+            return None
+        return (x0, y0, x1, y1)
+
+class CheckpointStore:
+    """
+    Mode state on disk, so a restart resumes where the last run stopped.
+
+    Each mode gets a directory holding state.json (small settings) and one
+    .npy file per array. Arrays are memory-mapped copy-on-write on load:
+    restoring a 1080p plate costs no read up front, and modes may modify
+    the loaded array without touching the file. Arrays can be updated in
+    place one region at a time, so saving a paint canvas only writes the
+    rows that changed. state.json is replaced atomically.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory or config.CHECKPOINT_DIR
+
+    def _path(self, name, filename):
+        return os.path.join(self.directory, name, filename)
+
+    def save_state(self, name, state):
+        """
+        Write a mode's settings.
+
+        Args:
+            name: Mode checkpoint name
+            state: JSON-serializable dict
+        """
+        path = self._path(name, "state.json")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(temp_path, path)
+
+    def load_state(self, name):
+        """
+        Read a mode's settings.
+
+        Returns:
+            dict: The saved state, or None if there is none
+        """
+        path = self._path(name, "state.json")
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {path}: {e}")
+            return None
+
+    def save_array(self, name, key, array):
+        """Write a whole array (atomically)."""
+        path = self._path(name, f"{key}.npy")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = path + ".tmp.npy"
+        np.save(temp_path, array)
+        os.replace(temp_path, path)
+
+    def update_array(self, name, key, array, rect):
+        """
+        Write one region of an array into its saved copy.
+
+        Falls back to writing the whole array when there is no saved copy
+        of the same shape and type.
+
+        Args:
+            name: Mode checkpoint name
+            key: Array name
+            array: The full current array
+            rect: (x0, y0, x1, y1) region that changed
+        """
+        x0, y0, x1, y1 = rect
+        if not self.write_region(name, key, array[y0:y1, x0:x1], (x0, y0), array.shape):
+            self.save_array(name, key, array)
+
+    def write_region(self, name, key, region, origin, shape):
+        """
+        Write a region into a saved array in place.
+
+        Args:
+            name: Mode checkpoint name
+            key: Array name
+            region: Pixels to write
+            origin: (x0, y0) of the region
+            shape: Shape the saved array must have
+
+        Returns:
+            bool: False if there is no saved copy of that shape and type
+        """
+        path = self._path(name, f"{key}.npy")
+        try:
+            saved = np.load(path, mmap_mode='r+')
+        except (OSError, ValueError):
+            return False
+        if saved.shape != tuple(shape) or saved.dtype != region.dtype:
+            return False
+
+        x0, y0 = origin
+        h, w = region.shape[:2]
+        saved[y0:y0 + h, x0:x0 + w] = region
+        saved.flush()
+        return True
+
+    def append_array(self, name, key, rows):
+        """
+        Append rows to a saved array in place.
+
+        Only the new rows and the .npy header are written; the header goes
+        last, so an interrupted append leaves the saved array as it was.
+
+        Args:
+            name: Mode checkpoint name
+            key: Array name
+            rows: Rows to add (same row shape and type as the saved array)
+
+        Returns:
+            bool: False if there is no compatible saved copy to append to,
+            in which case the caller should save the whole array instead
+        """
+        path = self._path(name, f"{key}.npy")
+        try:
+            with open(path, 'r+b') as f:
+                version = np.lib.format.read_magic(f)
+                if version != (1, 0):
+                    return False
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+                header_size = f.tell()
+                if fortran_order or dtype != rows.dtype or tuple(shape[1:]) != rows.shape[1:]:
+                    return False
+
+                header = io.BytesIO()
+                np.lib.format.write_array_header_1_0(header, {
+                    'descr': np.lib.format.dtype_to_descr(dtype),
+                    'fortran_order': False,
+                    'shape': (shape[0] + len(rows),) + tuple(shape[1:]),
+                })
+                # np.save leaves room for the row count to grow; bail out if it can't
+                if len(header.getvalue()) != header_size:
+                    return False
+
+                f.seek(header_size + int(np.prod(shape)) * dtype.itemsize)
+                f.write(np.ascontiguousarray(rows).tobytes())
+                f.flush()
+                f.seek(0)
+                f.write(header.getvalue())
+        except (OSError, ValueError):
+            return False
+        return True
+
+    def load_array(self, name, key):
+        """
+        Memory-map a saved array (copy-on-write).
+
+        Returns:
+            numpy.ndarray: The array, or None if there is none
+        """
+        path = self._path(name, f"{key}.npy")
+        if not os.path.exists(path):
+            return None
+        try:
+            return np.load(path, mmap_mode='c')
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {path}: {e}")
+            return None
+
+    def remove_array(self, name, key):
+        """Delete a saved array, if any."""
+        path = self._path(name, f"{key}.npy")
+        if os.path.exists(path):
+            os.remove(path)
+
+class CheckpointWriter:
+    """
+    Does a CheckpointStore's writes on a worker thread.
+
+    Offers the store's write methods. Each one copies what it writes (the
+    settings, the changed region, the new rows) before returning, so the
+    caller can keep modifying its arrays; the worker applies the writes in
+    order. The shape of every saved array is tracked as it will be once
+    queued writes are done, so in-place updates and appends can be checked
+    without touching the disk. After an in-place write fails on the worker,
+    the array counts as missing, so its next write saves it whole.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.jobs = deque()
+        self.jobs_changed = threading.Condition()
+        self.busy = False
+        self.is_running = False
+        self.thread = None
+        self.layouts = {}  # (name, key) -> (shape, dtype) of the saved array, or None
+        self.failed = set()  # (name, key) whose last in-place write failed
+
+    def _submit(self, job, *args):
+        with self.jobs_changed:
+            if not self.is_running:
+                self.is_running = True
+                self.thread = threading.Thread(target=self._worker_loop, name="CheckpointWriter", daemon=True)
+                self.thread.start()
+            self.jobs.append((job, args))
+            self.jobs_changed.notify_all()
+
+    def _worker_loop(self):
+        """Run queued writes until stopped and the queue is drained."""
+        while True:
+            with self.jobs_changed:
+                self.busy = False
+                self.jobs_changed.notify_all()
+                self.jobs_changed.wait_for(lambda: self.jobs or not self.is_running)
+                if not self.jobs:
+                    break
+                job, args = self.jobs.popleft()
+                self.busy = True
+            try:
+                job(*args)
+            except Exception as e:
+                logger.log_error("Checkpoint write failed", str(e))
+
+    def _in_place(self, write, name, key, *args):
+        """Run an in-place write, remembering the array if it fails."""
+        if not write(name, key, *args):
+            with self.jobs_changed:
+                self.failed.add((name, key))
+
+    def _layout(self, name, key):
+        """Shape and dtype the saved array will have, or None if there is none."""
+        with self.jobs_changed:
+            if (name, key) in self.failed:
+                self.failed.discard((name, key))
+                self.layouts[(name, key)] = None
+        if (name, key) not in self.layouts:
+            self.flush()
+            saved = self.store.load_array(name, key)
+            self.layouts[(name, key)] = None if saved is None else (saved.shape, saved.dtype)
+        return self.layouts[(name, key)]
+
+    def save_state(self, name, state):
+        """Queue writing a mode's settings."""
+        self._submit(self.store.save_state, name, copy.deepcopy(state))
+
+    def save_array(self, name, key, array):
+        """Queue writing a whole array."""
+        self.layouts[(name, key)] = (array.shape, array.dtype)
+        self._submit(self.store.save_array, name, key, np.array(array))
+
+    def update_array(self, name, key, array, rect):
+        """Queue writing one region of an array (see CheckpointStore.update_array)."""
+        if self._layout(name, key) != (array.shape, array.dtype):
+            self.save_array(name, key, array)
+            return
+        x0, y0, x1, y1 = rect
+        self._submit(self._in_place, self.store.write_region, name, key,
+                     array[y0:y1, x0:x1].copy(), (x0, y0), array.shape)
+
+    def append_array(self, name, key, rows):
+        """
+        Queue appending rows to a saved array (see CheckpointStore.append_array).
+
+        Returns:
+            bool: False if there is no compatible saved array to append to
+        """
+        layout = self._layout(name, key)
+        if layout is None or layout[1] != rows.dtype or layout[0][1:] != rows.shape[1:]:
+            return False
+        shape, dtype = layout
+        self.layouts[(name, key)] = ((shape[0] + len(rows),) + shape[1:], dtype)
+        self._submit(self._in_place, self.store.append_array, name, key, np.array(rows))
+        return True
+
+    def remove_array(self, name, key):
+        """Queue deleting a saved array."""
+        self.layouts[(name, key)] = None
+        self._submit(self.store.remove_array, name, key)
+
+    def flush(self):
+        """Wait until every queued write is done."""
+        with self.jobs_changed:
+            self.jobs_changed.wait_for(lambda: not self.jobs and not self.busy)
+
+    def stop(self):
+        """Finish the queued writes and stop the worker thread."""
+        with self.jobs_changed:
+            self.is_running = False
+            self.jobs_changed.notify_all()
+
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+class CheckpointManager:
+    """
+    Restores modes at startup and autosaves them while running.
+
+    Modes opt in through BaseMode.save_checkpoint/restore_checkpoint and
+    are responsible for only writing what changed since their last save.
+    Saves go through a CheckpointWriter, so the render thread only copies
+    the changed data and the disk writes happen in the background.
+    """
+
+    def __init__(self, store=None, interval=None, enabled=None):
+        self.store = store or CheckpointStore()
+        self.writer = CheckpointWriter(self.store)
+        self.interval = interval or config.CHECKPOINT_INTERVAL
+        self.enabled = config.CHECKPOINT_ENABLED if enabled is None else enabled
+        self.last_save = time.time()
+
+    def restore(self, modes):
+        """Load saved state into each mode."""
+        if not self.enabled:
+            return
+        for mode in modes:
+            try:
+                mode.restore_checkpoint(self.store)
+            except Exception as e:
+                logger.log_error("Checkpoint restore failed", f"{type(mode).__name__}: {e}")
+
+    def save(self, modes):
+        """Save every mode now."""
+        if not self.enabled:
+            return
+        for mode in modes:
+            try:
+                mode.save_checkpoint(self.writer)
+            except Exception as e:
+                logger.log_error("Checkpoint save failed", f"{type(mode).__name__}: {e}")
+        self.last_save = time.time()
+
+    def autosave(self, modes):
+        """Save every mode if the autosave interval has elapsed."""
+        if self.enabled and time.time() - self.last_save >= self.interval:
+            self.save(modes)
+
+    def close(self):
+        """Wait for pending saves to reach the disk."""
+        self.writer.stop()
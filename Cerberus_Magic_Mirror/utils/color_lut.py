@@ -0,0 +1,110 @@
+# Cerberus Magic Mirror - Color Lookup Table Utility
+# Author: Sudeepa Wanigarathna
+
+import hashlib
+import os
+import cv2
+import numpy as np
+import config
+from utils.logger import logger
+
+# Table layout: one row per red value, one column per (blue >> 1, green >> 1)
+# pair packed as blue | green << 8. cv2.remap then does the lookup, with
+# the packed pixel bytes reinterpreted as its int16 (x, y) map (this
+# relies on little-endian byte order, as on x86 and ARM).
+LUT_ROWS = 256
+LUT_COLS = (127 | (127 << 8)) + 1  # Must stay below SHRT_MAX for cv2.remap
+
+class ColorLUT:
+    """
+    Classifies BGR pixels against HSV ranges with one table lookup.
+
+    The table covers every BGR colour (blue and green quantized to 7 bits,
+    red at full precision) and is built once per set of ranges by
+    converting all of them to HSV and applying the same cv2.inRange tests
+    as the per-frame path. Several ranges (e.g. red on both sides of the
+    hue wrap-around) collapse into one lookup. Built tables are cached on
+    disk under config.COLOR_LUT_CACHE_DIR, keyed by the ranges.
+    """
+
+    def __init__(self, ranges, use_cache=None):
+        """
+        Args:
+            ranges: List of (lower, upper) HSV bounds, as passed to cv2.inRange
+            use_cache: Load/save the table on disk (defaults to config.COLOR_LUT_CACHE)
+        """
+        self.ranges = [(np.asarray(lower, dtype=np.float64), np.asarray(upper, dtype=np.float64))
+                       for lower, upper in ranges]
+        self.use_cache = config.COLOR_LUT_CACHE if use_cache is None else use_cache
+        self.capacity = 0
+        self.table = self._load_or_build()
+
+    def _cache_path(self):
+        """File the table for these ranges is cached in."""
+        key = repr([(lower.round(3).tolist(), upper.round(3).tolist()) for lower, upper in self.ranges])
+        digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+        return os.path.join(config.COLOR_LUT_CACHE_DIR, f"lut_{digest}.npy")
+
+    def _load_or_build(self):
+        """Read the table from the disk cache, building it if needed."""
+        path = self._cache_path()
+        if self.use_cache and os.path.exists(path):
+            try:
+                packed = np.load(path)
+                return np.unpackbits(packed).reshape(LUT_ROWS, LUT_COLS) * np.uint8(255)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable colour table {path}: {e}")
+
+        table = self._build()
+        if self.use_cache:
+            try:
+                os.makedirs(config.COLOR_LUT_CACHE_DIR, exist_ok=True)
+                # A binary mask packs to 1 bit per entry (~1 MB)
+                np.save(path, np.packbits(table > 0))
+            except OSError as e:
+                logger.warning(f"Could not cache colour table: {e}")
+        return table
+
+    def _build(self):
+        """Classify every representable colour."""
+        cols = np.arange(LUT_COLS)
+        colors = np.empty((LUT_ROWS, LUT_COLS, 3), dtype=np.uint8)
+        colors[..., 0] = (cols & 0x7F) << 1
+        colors[..., 1] = ((cols >> 8) & 0x7F) << 1
+        colors[..., 2] = np.arange(LUT_ROWS, dtype=np.uint8)[:, None]
+
+        hsv = cv2.cvtColor(colors, cv2.COLOR_BGR2HSV)
+        table = np.zeros((LUT_ROWS, LUT_COLS), dtype=np.uint8)
+        for lower, upper in self.ranges:
+            cv2.bitwise_or(table, cv2.inRange(hsv, lower, upper), dst=table)
+        return table
+
+    def _buffers(self, shape):
+        """Scratch buffers for an image size; storage only grows."""
+        h, w = shape[:2]
+        size = h * w
+        if size > self.capacity:
+            self.capacity = size
+            self._packed = np.empty(size * 4, dtype=np.uint8)
+            self._scratch = np.empty(size, dtype=np.uint32)
+        packed = self._packed[:size * 4].reshape(h, w, 4)
+        return packed, self._scratch[:size].reshape(h, w)
+
+    def classify(self, frame):
+        """
+        Build the mask for a BGR image (or ROI view).
+
+        Returns:
+            numpy.ndarray: uint8 mask, 255 where the colour is in any range
+        """
+        packed, scratch = self._buffers(frame.shape)
+        cv2.cvtColor(frame, cv2.COLOR_BGR2BGRA, dst=packed)
+
+        # B | G << 8 | R << 16 | A << 24  ->  (B >> 1) | (G >> 1) << 8 | R << 16
+        words = packed.view(np.uint32)[..., 0]
+        np.right_shift(words, 1, out=scratch)
+        np.bitwise_and(scratch, 0x7F7F, out=scratch)
+        np.bitwise_and(words, 0xFF0000, out=words)
+        np.bitwise_or(words, scratch, out=words)
+
+        return cv2.remap(self.table, packed.view(np.int16), None, cv2.INTER_NEAREST)
@@ -0,0 +1,215 @@
+# Cerberus Magic Mirror - Display Utility
+# Author: Sudeepa Wanigarathna
+
+import cv2
+import json
+import sys
+import config
+from utils.recorder import VideoRecorder
+
+NO_KEY = 255  # cv2.waitKey value when nothing was pressed
+
+MOUSE_EVENTS = {
+    'move': cv2.EVENT_MOUSEMOVE,
+    'down': cv2.EVENT_LBUTTONDOWN,
+    'up': cv2.EVENT_LBUTTONUP,
+    'right_down': cv2.EVENT_RBUTTONDOWN,
+    'right_up': cv2.EVENT_RBUTTONUP,
+}
+
+class WindowDisplay:
+    """Shows frames in a HighGUI window and reads keyboard/mouse input from it."""
+
+    def __init__(self, window_name=None, mouse_callback=None):
+        self.window_name = window_name or config.WINDOW_NAME
+        cv2.namedWindow(self.window_name)
+        if mouse_callback is not None:
+            cv2.setMouseCallback(self.window_name, mouse_callback)
+
+    def show(self, frame):
+        """Display a frame."""
+        cv2.imshow(self.window_name, frame)
+
+    def poll_key(self):
+        """Pump window events and return the pressed key (NO_KEY if none)."""
+        return cv2.waitKey(config.WAITKEY_DELAY) & 0xFF
+
+    def is_finished(self):
+        """Window display runs until the user quits."""
+        return False
+
+    def close(self):
+        """Destroy the window."""
+        cv2.destroyAllWindows()
+
+
+class FrameHandoff:
+    """
+    Gives input callbacks the current frame without copying it every loop.
+
+    Clicks receive a private copy, made on the first click for a frame.
+    Mouse-move events get a read-only view, so hovering costs nothing.
+    """
+
+    def __init__(self):
+        self.frame = None
+        self.snapshot = None
+
+    def publish(self, frame):
+        """Make a new frame current (no copy)."""
+        self.frame = frame
+        self.snapshot = None
+
+    def get(self, event=None):
+        """Return the current frame for a mouse event."""
+        if self.frame is None:
+            return None
+
+        if event == cv2.EVENT_MOUSEMOVE:
+            view = self.frame.view()
+            view.flags.writeable = False
+            return view
+
+        if self.snapshot is None:
+            self.snapshot = self.frame.copy()
+        return self.snapshot
+
+
+class NullSink:
+    """Discards frames; used to measure pure processing throughput."""
+
+    def write(self, frame):
+        pass
+
+    def close(self):
+        pass
+
+
+class RecorderSink:
+    """Writes every output frame to a video file in the recordings folder."""
+
+    def __init__(self):
+        # Offline output must not lose frames, so wait for the encoder
+        self.recorder = VideoRecorder(drop_policy="block")
+
+    def write(self, frame):
+        if not self.recorder.is_recording:
+            h, w = frame.shape[:2]
+            if not self.recorder.start_recording(w, h):
+                raise RuntimeError("Could not start output recording")
+        self.recorder.write_frame(frame)
+
+    def close(self):
+        self.recorder.cleanup()
+
+
+class PipeSink:
+    """
+    Streams raw BGR24 frames to stdout, e.g. for `| ffmpeg -f rawvideo ...`.
+
+    Console output from print() is redirected to stderr so it cannot
+    corrupt the frame stream.
+    """
+
+    def __init__(self):
+        self.stream = sys.stdout.buffer
+        sys.stdout = sys.stderr
+        self.frame_size = None
+
+    def write(self, frame):
+        if self.frame_size is None:
+            self.frame_size = frame.shape[:2]
+            h, w = self.frame_size
+            print(f"Raw output: bgr24 {w}x{h}", file=sys.stderr)
+        self.stream.write(frame.tobytes())
+
+    def close(self):
+        self.stream.flush()
+
+
+OUTPUT_SINKS = {
+    'null': NullSink,
+    'record': RecorderSink,
+    'stdout': PipeSink,
+}
+
+
+class InputScript:
+    """
+    Scripted keyboard and mouse events for headless runs.
+
+    The script is a JSON list of events keyed by loop iteration, e.g.
+        [{"frame": 45, "key": "b"},
+         {"frame": 90, "mouse": "down", "x": 320, "y": 260},
+         {"frame": 300, "key": "q"}]
+    Keys are single characters or integer key codes.
+    """
+
+    def __init__(self, events=None):
+        self.keys = {}
+        self.mouse = {}
+        for event in events or []:
+            frame = int(event['frame'])
+            if 'key' in event:
+                key = event['key']
+                code = key if isinstance(key, int) else ord(key)
+                self.keys.setdefault(frame, []).append(code)
+            if 'mouse' in event:
+                action = MOUSE_EVENTS[event['mouse']]
+                self.mouse.setdefault(frame, []).append((action, int(event['x']), int(event['y'])))
+        self.last_frame = max(list(self.keys) + list(self.mouse), default=-1)
+
+    @classmethod
+    def load(cls, path):
+        """Load a script from a JSON file."""
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def keys_at(self, frame):
+        """Return key codes scheduled for an iteration."""
+        return self.keys.get(frame, [])
+
+    def mouse_at(self, frame):
+        """Return (event, x, y) mouse events scheduled for an iteration."""
+        return self.mouse.get(frame, [])
+
+
+class HeadlessDisplay:
+    """
+    Runs without a window: frames go to an output sink and input comes
+    from an InputScript.
+    """
+
+    def __init__(self, sink=None, script=None, mouse_callback=None, max_frames=None):
+        self.sink = sink or NullSink()
+        self.script = script or InputScript()
+        self.mouse_callback = mouse_callback
+        self.max_frames = max_frames
+        self.iteration = 0
+        self.pending_keys = []
+
+    def show(self, frame):
+        """Send a frame to the output sink."""
+        self.sink.write(frame)
+
+    def poll_key(self):
+        """Dispatch this iteration's scripted events and return the next key."""
+        if self.mouse_callback is not None:
+            for event, x, y in self.script.mouse_at(self.iteration):
+                self.mouse_callback(event, x, y, 0, None)
+
+        # Several keys on one iteration are delivered on consecutive polls
+        self.pending_keys.extend(self.script.keys_at(self.iteration))
+        self.iteration += 1
+
+        if self.pending_keys:
+            return self.pending_keys.pop(0)
+        return NO_KEY
+
+    def is_finished(self):
+        """True once the frame limit is reached."""
+        return self.max_frames is not None and self.iteration >= self.max_frames
+
+    def close(self):
+        """Flush and close the output sink."""
+        self.sink.close()
@@ -0,0 +1,310 @@
+# Cerberus Magic Mirror - Frame Source Utility
+# Author: Sudeepa Wanigarathna
+
+import cv2
+import glob
+import os
+import re
+import time
+import numpy as np
+from abc import ABC, abstractmethod
+import config
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff')
+
+def natural_sort_key(path):
+    """Sort key that orders embedded numbers by value (frame_2 before frame_10)."""
+    return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', path)]
+
+class FrameSource(ABC):
+    """
+    Common interface for everything that can feed frames into the mirror.
+
+    read() and release() mirror cv2.VideoCapture so a source can be used
+    anywhere a capture object is expected.
+    """
+
+    # Live sources drop stale frames; recorded ones can replay every frame
+    is_live = False
+
+    @abstractmethod
+    def read(self):
+        """
+        Return (ret, frame) for the next frame; ret is False at end of input.
+        """
+        pass
+
+    @abstractmethod
+    def get_size(self):
+        """
+        Return the (width, height) of produced frames.
+        """
+        pass
+
+    def is_opened(self):
+        """
+        Return True if the source is ready to deliver frames.
+        """
+        return True
+
+    def release(self):
+        """
+        Free any underlying resources.
+        """
+        pass
+
+    def get_name(self):
+        """
+        Return a short description for logs.
+        """
+        return self.__class__.__name__
+
+
+class FramePacer:
+    """Sleeps so that frames are delivered at a fixed rate."""
+
+    def __init__(self, fps):
+        self.interval = 1.0 / fps if fps and fps > 0 else 0
+        self.next_time = None
+
+    def wait(self):
+        """Block until the next frame is due."""
+        if not self.interval:
+            return
+
+        now = time.time()
+        if self.next_time is None:
+            self.next_time = now
+        elif self.next_time > now:
+            time.sleep(self.next_time - now)
+        else:
+            # Running late: don't try to catch up with a burst of frames
+            self.next_time = now
+        self.next_time += self.interval
+
+
+class CameraSource(FrameSource):
+    """Live webcam input."""
+
+    is_live = True
+
+    def __init__(self, index=None, width=None, height=None, fps=None):
+        self.index = config.CAMERA_INDEX if index is None else index
+        self.cap = cv2.VideoCapture(self.index)
+
+        if self.cap.isOpened():
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width or config.CAMERA_WIDTH)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height or config.CAMERA_HEIGHT)
+            self.cap.set(cv2.CAP_PROP_FPS, fps or config.CAMERA_FPS)
+
+    def read(self):
+        return self.cap.read()
+
+    def get_size(self):
+        return (int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+
+    def is_opened(self):
+        return self.cap.isOpened()
+
+    def release(self):
+        self.cap.release()
+
+    def get_name(self):
+        return f"camera {self.index}"
+
+
+class VideoFileSource(FrameSource):
+    """Replays a video file, paced at its own frame rate or as fast as possible."""
+
+    def __init__(self, path, realtime=True, loop=False):
+        self.path = path
+        self.loop = loop
+        self.cap = cv2.VideoCapture(path)
+
+        fps = self.cap.get(cv2.CAP_PROP_FPS) if self.cap.isOpened() else 0
+        self.size = (int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                     int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        self.pacer = FramePacer((fps or config.CAMERA_FPS) if realtime else 0)
+
+    def read(self):
+        ret, frame = self.cap.read()
+        if not ret and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read()
+
+        if ret:
+            self.pacer.wait()
+        return ret, frame
+
+    def get_size(self):
+        return self.size
+
+    def is_opened(self):
+        return self.cap.isOpened()
+
+    def release(self):
+        self.cap.release()
+
+    def get_name(self):
+        return f"video {self.path}"
+
+
+class ImageSequenceSource(FrameSource):
+    """Plays a numbered image sequence from a directory or glob pattern."""
+
+    def __init__(self, path, fps=None, realtime=True, loop=False):
+        self.path = path
+        self.loop = loop
+
+        if os.path.isdir(path):
+            files = [os.path.join(path, f) for f in os.listdir(path)]
+        else:
+            files = glob.glob(path)
+        self.files = sorted((f for f in files if f.lower().endswith(IMAGE_EXTENSIONS)), key=natural_sort_key)
+
+        self.position = 0
+        self.size = None
+        self.pacer = FramePacer((fps or config.CAMERA_FPS) if realtime else 0)
+
+    def read(self):
+        if self.position >= len(self.files):
+            if not self.loop or not self.files:
+                return False, None
+            self.position = 0
+
+        frame = cv2.imread(self.files[self.position])
+        self.position += 1
+        if frame is None:
+            return False, None
+
+        self.pacer.wait()
+        return True, frame
+
+    def get_size(self):
+        if self.size is None and self.files:
+            first = cv2.imread(self.files[0])
+            if first is not None:
+                self.size = (first.shape[1], first.shape[0])
+        return self.size or (0, 0)
+
+    def is_opened(self):
+        return len(self.files) > 0
+
+    def get_name(self):
+        return f"images {self.path} ({len(self.files)} frames)"
+
+
+class SyntheticSource(FrameSource):
+    """
+    Deterministic generated footage for tests and benchmarks.
+
+    The first frames show an empty textured scene (for cloak background
+    capture), then a red cloak patch and a blue marker move across it.
+    The same seed always yields the same frames.
+    """
+
+    def __init__(self, width=None, height=None, num_frames=None, seed=None,
+                 fps=None, realtime=False, loop=False):
+        self.width = width or config.CAMERA_WIDTH
+        self.height = height or config.CAMERA_HEIGHT
+        self.num_frames = config.SYNTHETIC_FRAMES if num_frames is None else num_frames
+        self.seed = config.SYNTHETIC_SEED if seed is None else seed
+        self.empty_frames = config.SYNTHETIC_EMPTY_FRAMES
+        self.loop = loop
+        self.position = 0
+        self.pacer = FramePacer((fps or config.CAMERA_FPS) if realtime else 0)
+
+        rng = np.random.default_rng(self.seed)
+
+        # Static textured scene: gradient plus a few seeded blocks
+        ys, xs = np.mgrid[0:self.height, 0:self.width]
+        scene = np.empty((self.height, self.width, 3), np.uint8)
+        scene[:, :, 0] = (80 + 60 * xs / self.width).astype(np.uint8)
+        scene[:, :, 1] = (90 + 50 * ys / self.height).astype(np.uint8)
+        scene[:, :, 2] = 70
+        for _ in range(12):
+            x, y = int(rng.integers(0, self.width)), int(rng.integers(0, self.height))
+            bw = int(rng.integers(self.width // 16 + 1, self.width // 4 + 2))
+            bh = int(rng.integers(self.height // 16 + 1, self.height // 4 + 2))
+            gray = int(rng.integers(60, 190))
+            color = tuple(gray + int(c) for c in rng.integers(-10, 11, 3))
+            cv2.rectangle(scene, (x, y), (x + bw, y + bh), color, -1)
+        self.scene = scene
+
+        # A handful of sensor-noise planes, cycled per frame
+        self.noise = [rng.integers(-4, 5, scene.shape, dtype=np.int16) for _ in range(4)]
+
+    def read(self):
+        if self.num_frames and self.position >= self.num_frames:
+            if not self.loop:
+                return False, None
+            self.position = 0
+
+        frame = self.render(self.position)
+        self.position += 1
+        self.pacer.wait()
+        return True, frame
+
+    def render(self, index):
+        """Render frame number `index`."""
+        noise = self.noise[index % len(self.noise)]
+        frame = np.clip(self.scene + noise, 0, 255).astype(np.uint8)
+
+        if index < self.empty_frames:
+            return frame
+
+        t = (index - self.empty_frames) / 30.0
+        w, h = self.width, self.height
+        scale = min(w, h)
+
+        # Red cloak: a rounded patch drifting on a slow Lissajous path
+        cx = int(w * (0.5 + 0.25 * np.sin(t * 0.9)))
+        cy = int(h * (0.55 + 0.15 * np.sin(t * 1.3)))
+        axes = (int(scale * 0.18), int(scale * 0.26))
+        cv2.ellipse(frame, (cx, cy), axes, 0, 0, 360, (20, 20, 200), -1)
+
+        # Blue marker for object-tracked painting
+        mx = int(w * (0.5 + 0.35 * np.cos(t * 1.7)))
+        my = int(h * (0.35 + 0.2 * np.sin(t * 2.3)))
+        cv2.circle(frame, (mx, my), max(12, int(scale * 0.04)), (200, 60, 20), -1)
+        return frame
+
+    def get_size(self):
+        return (self.width, self.height)
+
+    def get_name(self):
+        return f"synthetic {self.width}x{self.height} seed={self.seed}"
+
+
+def create_frame_source(kind=None, path=None, realtime=None, loop=None,
+                        width=None, height=None, num_frames=None, seed=None, camera_index=None):
+    """
+    Build a frame source from config defaults and optional overrides.
+
+    Args:
+        kind: "camera", "video", "images" or "synthetic"
+        path: Video file, image directory or glob (for "video"/"images")
+        realtime: Pace recorded sources at their frame rate (False = as fast as possible)
+        loop: Restart recorded sources at end of input
+
+    Returns:
+        FrameSource: The requested source
+    """
+    kind = kind or config.FRAME_SOURCE
+    path = path or config.FRAME_SOURCE_PATH
+    realtime = config.FRAME_SOURCE_REALTIME if realtime is None else realtime
+    loop = config.FRAME_SOURCE_LOOP if loop is None else loop
+
+    if kind == "camera":
+        return CameraSource(camera_index, width, height)
+    if kind in ("video", "images") and not path:
+        raise ValueError(f"Frame source '{kind}' needs an input path")
+    if kind == "video":
+        return VideoFileSource(path, realtime=realtime, loop=loop)
+    if kind == "images":
+        return ImageSequenceSource(path, realtime=realtime, loop=loop)
+    if kind == "synthetic":
+        return SyntheticSource(width, height, num_frames, seed, realtime=realtime, loop=loop)
+
+    raise ValueError(f"Unknown frame source: {kind}")
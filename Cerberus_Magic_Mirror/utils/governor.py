@@ -0,0 +1,93 @@
+# Cerberus Magic Mirror - Quality Governor Utility
+# Author: Sudeepa Wanigarathna
+
+import config
+from utils.logger import logger
+
+class QualityGovernor:
+    """
+    Steps a mode's quality level down or up to hold a frame-time budget.
+
+    Level 0 is full quality; higher levels are cheaper. The governor
+    smooths the measured work time per frame and only changes level after
+    the budget has been missed (or comfortably met) for a number of
+    consecutive frames, with a cooldown so each change can take effect.
+    """
+
+    def __init__(self, target_fps=None):
+        target_fps = target_fps or config.GOVERNOR_TARGET_FPS or config.CAMERA_FPS
+        self.budget = 1.0 / target_fps
+        self.mode = None
+        self.level = 0
+        self.smoothed_time = None
+        self.over_budget_frames = 0
+        self.under_budget_frames = 0
+        self.cooldown = 0
+
+    def attach(self, mode):
+        """Start governing a mode, keeping whatever level it is at."""
+        self.mode = mode
+        self.level = mode.get_quality_level()
+        self.smoothed_time = None
+        self.over_budget_frames = 0
+        self.under_budget_frames = 0
+        self.cooldown = 0
+
+    def get_level_count(self):
+        """Number of quality levels the current mode offers."""
+        return self.mode.get_quality_levels() if self.mode else 1
+
+    def observe(self, frame_time):
+        """
+        Feed the work time of one frame (seconds) and adjust the level.
+
+        Returns:
+            bool: True if the quality level changed
+        """
+        if self.mode is None:
+            return False
+
+        alpha = config.GOVERNOR_SMOOTHING
+        if self.smoothed_time is None:
+            self.smoothed_time = frame_time
+        else:
+            self.smoothed_time += alpha * (frame_time - self.smoothed_time)
+
+        if self.cooldown > 0:
+            self.cooldown -= 1
+            return False
+
+        if self.smoothed_time > self.budget:
+            self.over_budget_frames += 1
+            self.under_budget_frames = 0
+        elif self.smoothed_time < self.budget * config.GOVERNOR_UPGRADE_HEADROOM:
+            self.under_budget_frames += 1
+            self.over_budget_frames = 0
+        else:
+            self.over_budget_frames = 0
+            self.under_budget_frames = 0
+
+        if self.over_budget_frames >= config.GOVERNOR_DOWNGRADE_FRAMES and self.level < self.get_level_count() - 1:
+            return self._set_level(self.level + 1)
+        if self.under_budget_frames >= config.GOVERNOR_UPGRADE_FRAMES and self.level > 0:
+            return self._set_level(self.level - 1)
+        return False
+
+    def _set_level(self, level):
+        """Apply a new level to the mode."""
+        previous = self.level
+        self.level = level
+        self.mode.set_quality_level(level)
+        self.over_budget_frames = 0
+        self.under_budget_frames = 0
+        self.cooldown = config.GOVERNOR_COOLDOWN_FRAMES
+
+        direction = "down" if level > previous else "up"
+        logger.info(f"Quality {direction}: level {previous} -> {level} "
+                    f"(frame time {self.smoothed_time * 1000:.1f}ms, budget {self.budget * 1000:.1f}ms)")
+        return True
+
+    def get_label(self):
+        """Short text for the overlay, e.g. 'Quality 4/5' (5 = best)."""
+        count = self.get_level_count()
+        return f"Quality {count - self.level}/{count}"
@@ -0,0 +1,223 @@
+# Cerberus Magic Mirror - Asynchronous Hand Tracking Utility
+# Author: Sudeepa Wanigarathna
+
+import threading
+import time
+import cv2
+import numpy as np
+import config
+from utils.logger import logger
+
+class AsyncHandTracker:
+    """
+    Runs hand landmark inference off the render thread.
+
+    The render loop submits every frame; a worker thread always picks up
+    the newest one, so frames that arrive while the model is busy are
+    skipped rather than queued. Results are kept with the time of the
+    frame they came from, and get() extrapolates the landmarks of the two
+    latest results linearly to the current time, so the cursor keeps up
+    with the hand between (slower) inference results.
+
+    With threaded=False the detector runs inside submit() instead, which
+    gives the old synchronous behaviour (and deterministic results).
+    """
+
+    def __init__(self, detect, threaded=None, max_extrapolation=None, max_age=None):
+        """
+        Args:
+            detect: Callable taking a BGR frame and returning an (N, 2) float32
+                array of landmark pixel coordinates, or None if there is no hand.
+                In threaded mode it is only ever called from the worker thread.
+            threaded: Run inference on a worker thread (defaults to config.HAND_TRACKING_ASYNC)
+            max_extrapolation: Furthest ahead of a result landmarks are extrapolated (seconds)
+            max_age: Results older than this are treated as hand lost (seconds)
+        """
+        self.detect = detect
+        self.threaded = config.HAND_TRACKING_ASYNC if threaded is None else threaded
+        self.max_extrapolation = max_extrapolation or config.HAND_TRACKING_MAX_EXTRAPOLATION
+        self.max_age = max_age or config.HAND_TRACKING_MAX_AGE
+
+        self.frame_ready = threading.Condition()
+        self.thread = None
+        self.is_running = False
+        # Double buffer: submit() copies into pending while the worker reads working
+        self.pending = None
+        self.pending_time = None
+        self.has_pending = False
+        self.working = None
+
+        # Latest two results as (frame time, landmarks or None)
+        self.result_lock = threading.Lock()
+        self.latest = None
+        self.previous = None
+
+        # Statistics
+        self.inferences = 0
+        self.frames_skipped = 0
+        self.inference_rate = 0.0  # Results per second (smoothed)
+        self.inference_time = 0.0  # Seconds per inference (smoothed)
+        self.last_age = 0.0  # Age of the landmarks returned by the last get()
+        self.last_done = None
+
+    def start(self):
+        """Start the worker thread."""
+        if self.is_running:
+            return self
+
+        self.is_running = True
+        self.thread = threading.Thread(target=self._worker_loop, name="HandTracker", daemon=True)
+        self.thread.start()
+        return self
+
+    def submit(self, frame, timestamp):
+        """
+        Hand a frame to the tracker.
+
+        Args:
+            frame: BGR frame (copied; the caller may draw on it afterwards)
+            timestamp: Time the frame was taken, in time.time() seconds
+        """
+        if not self.threaded:
+            self._run(frame, timestamp)
+            return
+
+        if not self.is_running:
+            self.start()
+        with self.frame_ready:
+            if self.pending is None or self.pending.shape != frame.shape:
+                self.pending = np.empty_like(frame)
+            np.copyto(self.pending, frame)
+            if self.has_pending:
+                self.frames_skipped += 1
+            self.pending_time = timestamp
+            self.has_pending = True
+            self.frame_ready.notify()
+
+    def _worker_loop(self):
+        """Run inference on the newest submitted frame until stopped."""
+        while True:
+            with self.frame_ready:
+                self.frame_ready.wait_for(lambda: self.has_pending or not self.is_running)
+                if not self.is_running:
+                    break
+                self.pending, self.working = self.working, self.pending
+                timestamp = self.pending_time
+                self.has_pending = False
+            self._run(self.working, timestamp)
+
+    def _run(self, frame, timestamp):
+        """Detect landmarks in one frame and record the result."""
+        start = time.perf_counter()
+        try:
+            points = self.detect(frame)
+        except Exception as e:
+            logger.log_error("Hand tracking failed", str(e))
+            points = None
+        duration = time.perf_counter() - start
+
+        done = time.time()
+        with self.result_lock:
+            self.previous, self.latest = self.latest, (timestamp, points)
+            self.inferences += 1
+            self.inference_time = duration if self.inferences == 1 else \
+                0.9 * self.inference_time + 0.1 * duration
+            if self.last_done is not None and done > self.last_done:
+                rate = 1.0 / (done - self.last_done)
+                self.inference_rate = rate if self.inferences == 2 else \
+                    0.9 * self.inference_rate + 0.1 * rate
+            self.last_done = done
+
+    def get(self, now):
+        """
+        Get the landmarks extrapolated to a point in time.
+
+        Args:
+            now: Time to extrapolate to, in time.time() seconds
+
+        Returns:
+            numpy.ndarray: (N, 2) float32 landmark pixel coordinates, or None
+            if there is no hand or the latest result is too old
+        """
+        with self.result_lock:
+            latest, previous = self.latest, self.previous
+        if latest is None or latest[1] is None:
+            return None
+
+        timestamp, points = latest
+        self.last_age = max(0.0, now - timestamp)
+        if self.last_age > self.max_age:
+            return None
+
+        # Constant velocity from the last two results, if both saw the hand
+        if previous is not None and previous[1] is not None and \
+                0 < timestamp - previous[0] <= self.max_age and len(previous[1]) == len(points):
+            ahead = min(self.last_age, self.max_extrapolation)
+            velocity = (points - previous[1]) / (timestamp - previous[0])
+            return points + velocity * ahead
+        return points
+
+    def reset(self):
+        """Forget previous results (e.g. when tracking is switched off)."""
+        with self.result_lock:
+            self.latest = None
+            self.previous = None
+
+    def get_stats(self):
+        """
+        Get tracking statistics.
+
+        Returns:
+            dict: Inference rate (per second), inference time and landmark
+            age (seconds), inference and skipped frame counts
+        """
+        with self.result_lock:
+            return {
+                'rate': self.inference_rate,
+                'inference_time': self.inference_time,
+                'age': self.last_age,
+                'inferences': self.inferences,
+                'skipped': self.frames_skipped
+            }
+
+    def stop(self):
+        """Stop the worker thread."""
+        with self.frame_ready:
+            self.is_running = False
+            self.frame_ready.notify_all()
+
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+def prepare_hand_input(frame, size=None, downscale_above=None):
+    """
+    Convert a BGR frame for the hand model, downscaling large frames.
+
+    The model runs its networks at a fixed resolution, so only handling a
+    large input costs more; frames up to `downscale_above` pixels on their
+    longest side are passed as they are. The whole frame is always passed,
+    so landmarks normalized to the input map back to the frame by scaling
+    alone, and the model's own tracking (which crops around the last hand
+    itself) always sees the same coordinate frame.
+
+    Args:
+        frame: BGR frame
+        size: Longest side of a downscaled input (defaults to config.HAND_TRACKING_INPUT_SIZE)
+        downscale_above: Longest frame side above which frames are downscaled
+            (defaults to config.HAND_TRACKING_DOWNSCALE_ABOVE)
+
+    Returns:
+        numpy.ndarray: RGB model input
+    """
+    size = size or config.HAND_TRACKING_INPUT_SIZE
+    downscale_above = downscale_above or config.HAND_TRACKING_DOWNSCALE_ABOVE
+    h, w = frame.shape[:2]
+    # Downscale before converting so the conversion runs on the small image.
+    # Bilinear is several times faster than INTER_AREA and the model
+    # resamples its input bilinearly anyway.
+    if max(w, h) > downscale_above:
+        scale = size / max(w, h)
+        dsize = (max(1, round(w * scale)), max(1, round(h * scale)))
+        frame = cv2.resize(frame, dsize, interpolation=cv2.INTER_LINEAR)
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
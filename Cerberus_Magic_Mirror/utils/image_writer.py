@@ -0,0 +1,170 @@
+# Cerberus Magic Mirror - Image Writer Utility
+# Author: Sudeepa Wanigarathna
+
+import cv2
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import config
+from utils.logger import logger
+
+class ImageWriter:
+    """
+    Encodes and writes snapshots and exports on a small worker pool.
+
+    The render thread only pays for a memory copy; JPEG/PNG encoding and
+    disk I/O happen in the background.
+    """
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or config.SNAPSHOT_WRITER_WORKERS
+        self.executor = None
+        self.lock = threading.Lock()
+        self.pending = 0
+
+        # Most recent completed save, for on-screen confirmation
+        self.last_notice = None
+        self.last_notice_time = 0
+
+        # Burst capture state
+        self.burst_frames = []
+        self.burst_target = 0
+        self.burst_timestamp = None
+
+    def _get_executor(self):
+        """Create the worker pool on first use."""
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                               thread_name_prefix="ImageWriter")
+        return self.executor
+
+    def save(self, filename, image, notice="Snapshot Saved!"):
+        """
+        Queue an image to be written in the background.
+
+        Args:
+            filename: Output path; the extension selects the encoder
+            image: Image to save (copied before returning)
+            notice: Confirmation text shown once the write completes
+
+        Returns:
+            Future: Resolves to True if the image was written
+        """
+        with self.lock:
+            self.pending += 1
+        return self._get_executor().submit(self._write, filename, image.copy(), notice)
+
+    def _write(self, filename, image, notice):
+        """Encode and write one image (runs on a worker thread)."""
+        params = []
+        if filename.lower().endswith(('.jpg', '.jpeg')):
+            params = [cv2.IMWRITE_JPEG_QUALITY, config.SNAPSHOT_QUALITY]
+
+        try:
+            directory = os.path.dirname(filename)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            success = cv2.imwrite(filename, image, params)
+        except Exception as e:
+            logger.log_error("Image write failed", f"{filename}: {e}")
+            success = False
+
+        with self.lock:
+            self.pending -= 1
+            if success and notice:
+                self.last_notice = notice
+                self.last_notice_time = time.time()
+
+        if success:
+            logger.log_snapshot(filename)
+        else:
+            logger.error(f"Could not save image: {filename}")
+        return success
+
+    def get_notice(self):
+        """
+        Get the confirmation text for a recently completed save.
+
+        Returns:
+            str or None: Notice text while it should still be displayed
+        """
+        with self.lock:
+            if self.last_notice and time.time() - self.last_notice_time < config.SNAPSHOT_NOTICE_DURATION:
+                return self.last_notice
+        return None
+
+    def start_burst(self, count=None):
+        """
+        Begin capturing a burst of consecutive frames to memory.
+
+        Args:
+            count: Number of frames to capture (defaults to config.SNAPSHOT_BURST_COUNT)
+
+        Returns:
+            bool: True if a new burst was started
+        """
+        if self.is_bursting():
+            return False
+
+        self.burst_frames = []
+        self.burst_target = count or config.SNAPSHOT_BURST_COUNT
+        self.burst_timestamp = time.strftime("%Y%m%d-%H%M%S")
+        return True
+
+    def is_bursting(self):
+        """Return True while a burst is collecting frames."""
+        return self.burst_target > 0
+
+    def add_burst_frame(self, frame):
+        """
+        Store a frame for the active burst; flushes to disk once complete.
+
+        Returns:
+            bool: True if the frame was captured
+        """
+        if not self.is_bursting():
+            return False
+
+        self.burst_frames.append(frame.copy())
+        if len(self.burst_frames) >= self.burst_target:
+            self._flush_burst()
+        return True
+
+    def _flush_burst(self):
+        """Hand all captured burst frames to the worker pool."""
+        frames = self.burst_frames
+        total = len(frames)
+        for i, frame in enumerate(frames):
+            filename = os.path.join(
+                config.SNAPSHOT_DIR,
+                f"burst_{self.burst_timestamp}_{i + 1:02d}.{config.SNAPSHOT_FORMAT}"
+            )
+            notice = f"Burst Saved! ({total} frames)" if i == total - 1 else None
+            with self.lock:
+                self.pending += 1
+            # Frames are already private copies
+            self._get_executor().submit(self._write, filename, frame, notice)
+
+        print(f"📸 Burst captured: {total} frames")
+        self.burst_frames = []
+        self.burst_target = 0
+        self.burst_timestamp = None
+
+    def get_pending_count(self):
+        """Return the number of images still waiting to be written."""
+        with self.lock:
+            return self.pending
+
+    def shutdown(self, wait=True):
+        """Flush any partial burst and wait for outstanding writes."""
+        if self.burst_frames:
+            self._flush_burst()
+        self.burst_target = 0
+
+        if self.executor is not None:
+            self.executor.shutdown(wait=wait)
+            self.executor = None
+
+# Global image writer instance
+image_writer = ImageWriter()
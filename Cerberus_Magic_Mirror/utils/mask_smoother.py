@@ -0,0 +1,148 @@
+# Cerberus Magic Mirror - Temporal Mask Smoothing Utility
+# Author: Sudeepa Wanigarathna
+
+import cv2
+import numpy as np
+import config
+
+class MaskSmoother:
+    """
+    Temporal smoothing of uint8 masks at constant cost per frame.
+
+    "uniform" weighting averages the last `window` masks. The masks live in
+    a preallocated ring with a running uint16 sum: each push adds the new
+    mask and subtracts the one it evicts, so the cost does not depend on
+    the window length. The result matches
+    np.mean(last_masks, axis=0).astype(np.uint8).
+
+    "exponential" weighting keeps a float32 running average updated with
+    cv2.accumulateWeighted, with alpha = 2 / (window + 1) (the usual
+    span equivalence), and stores no history at all.
+
+    The returned mask is an internal buffer, valid until the next push().
+    """
+
+    def __init__(self, window=None, weighting=None):
+        self.window = window or config.CLOAK_TEMPORAL_WINDOW
+        self.weighting = weighting or config.CLOAK_TEMPORAL_WEIGHTING
+        if self.weighting not in ("uniform", "exponential"):
+            raise ValueError(f"Unknown mask weighting: {self.weighting}")
+
+        self.ring = None
+        self.sum = None
+        self.average = None
+        self.output = None
+        self.scratch = None
+        self.count = 0
+        self.index = 0
+
+    def reset(self):
+        """Forget all previous masks (buffers are kept)."""
+        self.count = 0
+        self.index = 0
+        if self.sum is not None:
+            self.sum.fill(0)
+        if self.ring is not None:
+            self.ring.fill(0)
+
+    def set_window(self, window):
+        """Change the window length, keeping the most recent masks."""
+        if window == self.window:
+            return
+
+        # Exponential weighting only changes its decay; the average carries over
+        if self.weighting == "uniform":
+            if self.ring is not None and self.count:
+                # Rebuild the ring oldest-first from the masks still inside the window
+                keep = min(self.count, window)
+                recent = [self.ring[(self.index - keep + i) % self.window] for i in range(keep)]
+                ring = np.zeros((window,) + self.ring.shape[1:], dtype=np.uint8)
+                self.sum.fill(0)
+                for i, mask in enumerate(recent):
+                    ring[i] = mask
+                    np.add(self.sum, mask, out=self.sum)
+                self.ring = ring
+                self.count = keep
+                self.index = keep % window
+            else:
+                self.ring = None
+                self.reset()
+        self.window = window
+
+    def push(self, mask, roi=None, frame_shape=None):
+        """
+        Add a mask and get the smoothed result.
+
+        With an ROI only that region is updated. The caller guarantees the
+        region contains everything nonzero in the current history (see
+        get_support()), so the rest of the smoothed mask is zero.
+
+        Args:
+            mask: Single-channel uint8 mask (the ROI crop when roi is given)
+            roi: Optional (x0, y0, x1, y1) region of the frame covered by mask
+            frame_shape: Full (height, width) of the frame, required with roi
+
+        Returns:
+            numpy.ndarray: Smoothed uint8 mask for the region (internal buffer)
+        """
+        shape = mask.shape if roi is None else tuple(frame_shape[:2])
+        if self.output is None or self.output.shape != shape:
+            self._allocate(shape)
+
+        region = np.s_[:, :] if roi is None else np.s_[roi[1]:roi[3], roi[0]:roi[2]]
+        output = self.output[region]
+
+        if self.weighting == "exponential":
+            average = self.average[region]
+            if self.count == 0:
+                self.average.fill(0)
+                average[:] = mask
+            else:
+                cv2.accumulateWeighted(mask, average, 2.0 / (self.window + 1))
+            self.count += 1
+            cv2.convertScaleAbs(average, dst=output)
+            return output
+
+        if self.ring is None:
+            self.ring = np.zeros((self.window,) + shape, dtype=np.uint8)
+
+        total = self.sum[region]
+        slot = self.ring[self.index][region]
+        if self.count == self.window:
+            np.subtract(total, slot, out=total)
+        else:
+            self.count += 1
+        slot[:] = mask
+        np.add(total, slot, out=total)
+        self.index = (self.index + 1) % self.window
+
+        if self.count == 1:
+            output[:] = mask
+        else:
+            scratch = self.scratch[region]
+            np.floor_divide(total, self.count, out=scratch)
+            output[:] = scratch
+        return output
+
+    def get_support(self, roi=None):
+        """
+        Mask of pixels any mask still in the history touches.
+
+        A region containing this support is a valid roi for the next push().
+
+        Returns:
+            numpy.ndarray: uint8 mask (nonzero = supported) for the region
+        """
+        region = np.s_[:, :] if roi is None else np.s_[roi[1]:roi[3], roi[0]:roi[2]]
+        if self.weighting == "exponential":
+            return self.output[region]
+        return cv2.compare(self.sum[region], 0, cv2.CMP_GT)
+
+    def _allocate(self, shape):
+        """Allocate buffers for a new mask size."""
+        self.ring = None
+        self.sum = np.zeros(shape, dtype=np.uint16)
+        self.scratch = np.empty(shape, dtype=np.uint16)
+        self.average = np.empty(shape, dtype=np.float32)
+        self.output = np.empty(shape, dtype=np.uint8)
+        self.reset()
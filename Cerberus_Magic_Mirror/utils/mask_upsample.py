@@ -0,0 +1,62 @@
+# Cerberus Magic Mirror - Mask Upsampling Utility
+# Author: Sudeepa Wanigarathna
+
+import cv2
+import numpy as np
+import config
+
+def linear_upsample(mask, size):
+    """
+    Bilinear upsampling of a uint8 mask.
+
+    Args:
+        mask: Low-resolution uint8 mask
+        size: (width, height) of the result
+    """
+    return cv2.resize(mask, size, interpolation=cv2.INTER_LINEAR)
+
+def guided_upsample(mask, guide_small, guide, radius=None, eps=None):
+    """
+    Edge-aware upsampling of a uint8 mask (fast guided filter, He & Sun).
+
+    The guided filter models the mask locally as a * intensity + b. The
+    coefficients are fitted at low resolution, where the mask was
+    computed, then bilinearly upsampled and applied to the full-resolution
+    grayscale guide, so mask edges follow edges in the image rather than
+    the low-resolution pixel grid.
+
+    Args:
+        mask: Low-resolution uint8 mask
+        guide_small: uint8 grayscale image at the mask's resolution
+        guide: uint8 grayscale image at the output resolution
+        radius: Box filter radius in low-resolution pixels
+        eps: Regularization; larger values smooth more, smaller follow edges harder
+
+    Returns:
+        numpy.ndarray: uint8 mask at the guide's resolution
+    """
+    radius = radius or config.CLOAK_GUIDED_RADIUS
+    eps = eps or config.CLOAK_GUIDED_EPS
+    box = (2 * radius + 1, 2 * radius + 1)
+
+    I = guide_small.astype(np.float32) * (1.0 / 255)
+    p = mask.astype(np.float32) * (1.0 / 255)
+
+    mean_I = cv2.boxFilter(I, -1, box)
+    mean_p = cv2.boxFilter(p, -1, box)
+    corr_Ip = cv2.boxFilter(I * p, -1, box)
+    corr_II = cv2.boxFilter(I * I, -1, box)
+
+    a = (corr_Ip - mean_I * mean_p) / (corr_II - mean_I * mean_I + eps)
+    b = mean_p - a * mean_I
+    mean_a = cv2.boxFilter(a, -1, box)
+    mean_b = cv2.boxFilter(b, -1, box)
+
+    h, w = guide.shape[:2]
+    mean_a = cv2.resize(mean_a, (w, h), interpolation=cv2.INTER_LINEAR)
+    mean_b = cv2.resize(mean_b, (w, h), interpolation=cv2.INTER_LINEAR)
+
+    # q = a * I + b at full resolution, scaled back to 0..255
+    q = cv2.multiply(mean_a, guide, dtype=cv2.CV_32F)
+    cv2.scaleAdd(mean_b, 255.0, q, dst=q)
+    return cv2.convertScaleAbs(q)
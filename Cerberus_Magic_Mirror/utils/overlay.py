@@ -1,20 +1,55 @@
 import cv2
+import numpy as np
 import config
+from utils.text_cache import text_cache
 
 class Overlay:
+    # Solid-colour scratch buffers for draw_panel, one per colour, grown on demand
+    _panel_fills = {}
+
     @staticmethod
-    def draw_text(frame, text, position, color=(255, 255, 255), scale=0.7, thickness=2, bg_color=None):
+    def draw_panel(frame, pt1, pt2, color=(0, 0, 0), opacity=0.7):
+        """
+        Draw a translucent filled rectangle, blending only the covered region.
+
+        Equivalent to drawing the rectangle on a copy of the frame and
+        blending the copy back with cv2.addWeighted, but without touching
+        (or copying) pixels outside the panel.
+
+        Args:
+            frame: Frame to draw on (modified in place)
+            pt1: (x1, y1) top-left corner
+            pt2: (x2, y2) bottom-right corner (inclusive, as in cv2.rectangle)
+            color: BGR panel colour
+            opacity: Panel weight in the blend (0 = invisible, 1 = solid)
+        """
+        h, w = frame.shape[:2]
+        x1, y1 = max(pt1[0], 0), max(pt1[1], 0)
+        x2, y2 = min(pt2[0] + 1, w), min(pt2[1] + 1, h)
+        if x1 >= x2 or y1 >= y2:
+            return
+
+        roi = frame[y1:y2, x1:x2]
+        rh, rw = roi.shape[:2]
+
+        color = tuple(int(c) for c in color)
+        fill = Overlay._panel_fills.get(color)
+        if fill is None or fill.shape[0] < rh or fill.shape[1] < rw or fill.shape[2:] != roi.shape[2:]:
+            fh, fw = (rh, rw) if fill is None else (max(rh, fill.shape[0]), max(rw, fill.shape[1]))
+            fill = np.empty((fh, fw) + roi.shape[2:], dtype=frame.dtype)
+            fill[:] = color[:roi.shape[2]] if roi.ndim == 3 else color[0]
+            Overlay._panel_fills[color] = fill
+
+        cv2.addWeighted(fill[:rh, :rw], opacity, roi, 1.0 - opacity, 0, dst=roi)
+
+    @staticmethod
+    def draw_text(frame, text, position, color=(255, 255, 255), scale=0.7, thickness=2, bg_color=None, cache=True):
         """
         Draw text with an optional background and outline for better visibility.
+        Pass cache=False for text that changes every frame.
         """
-        font = cv2.FONT_HERSHEY_SIMPLEX
-        x, y = position
-        
-        # Draw outline (black) for contrast
-        cv2.putText(frame, text, position, font, scale, (0, 0, 0), thickness + 3, cv2.LINE_AA)
-        
-        # Draw main text
-        cv2.putText(frame, text, position, font, scale, color, thickness, cv2.LINE_AA)
+        # Outline (black) for contrast; rendered once and reused from the sprite cache
+        text_cache.draw(frame, text, position, scale, color, thickness, (0, 0, 0), thickness + 3, cache)
 
     @staticmethod
     def draw_status(frame, mode_name, controls):
@@ -49,9 +84,8 @@ class Overlay:
                 max_width = max(max_width, text_w)
             
             # Draw semi-transparent background
-            overlay = frame.copy()
-            cv2.rectangle(overlay, (10, h - bottom_margin - total_height), (10 + max_width + 20, h - 10), (0, 0, 0), -1)
-            cv2.addWeighted(overlay, 0.6, frame, 0.4, 0, frame)
+            Overlay.draw_panel(frame, (10, h - bottom_margin - total_height), (10 + max_width + 20, h - 10),
+                               (0, 0, 0), 0.6)
             
             # Draw text
             y = h - bottom_margin
@@ -0,0 +1,86 @@
+# Cerberus Magic Mirror - Strip-Parallel Execution Utility
+# Author: Sudeepa Wanigarathna
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+import config
+
+class StripExecutor:
+    """
+    Runs per-pixel work on horizontal strips of a frame concurrently.
+
+    OpenCV and NumPy release the GIL inside their kernels, so strips of
+    one frame processed on a thread pool use several cores. Each strip
+    can be widened by `halo` rows on both sides for neighbourhood
+    operations (filters) whose output rows depend on rows above and
+    below; the strip function must only write its own rows.
+
+    With one worker, or a frame too short to split, the function runs
+    once over the whole frame on the calling thread at no extra cost.
+    """
+
+    def __init__(self, workers=None, min_strip_rows=None):
+        """
+        Args:
+            workers: Number of strips per frame (defaults to
+                config.PARALLEL_WORKERS, or one per CPU core)
+            min_strip_rows: Frames are never cut into strips shorter than this
+        """
+        self.workers = workers or config.PARALLEL_WORKERS or os.cpu_count() or 1
+        self.min_strip_rows = min_strip_rows or config.PARALLEL_MIN_STRIP_ROWS
+        self.executor = None
+
+    def _get_executor(self):
+        """Create the worker pool on first use (the caller runs one strip itself)."""
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers - 1,
+                                               thread_name_prefix="StripWorker")
+        return self.executor
+
+    def strips(self, height, halo=0):
+        """
+        Split rows into strips.
+
+        Args:
+            height: Number of rows
+            halo: Extra rows each strip may read above and below
+
+        Returns:
+            list: (y0, y1, h0, h1) per strip, where y0:y1 are the rows the
+            strip owns and h0:h1 the rows it may read
+        """
+        count = max(1, min(self.workers, height // self.min_strip_rows))
+        bounds = [i * height // count for i in range(count + 1)]
+        return [(y0, y1, max(0, y0 - halo), min(height, y1 + halo))
+                for y0, y1 in zip(bounds, bounds[1:])]
+
+    def run(self, func, height, halo=0):
+        """
+        Call func(y0, y1, h0, h1) for every strip and wait for all of them.
+
+        Exceptions raised by any strip are re-raised here.
+
+        Args:
+            func: Strip function (see strips() for the arguments)
+            height: Number of rows to cover
+            halo: Extra rows each strip may read above and below
+        """
+        strips = self.strips(height, halo)
+        if len(strips) == 1:
+            func(*strips[0])
+            return
+
+        executor = self._get_executor()
+        futures = [executor.submit(func, *strip) for strip in strips[1:]]
+        func(*strips[0])
+        for future in futures:
+            future.result()
+
+    def shutdown(self):
+        """Stop the worker threads."""
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+# Global executor instance
+strip_executor = StripExecutor()
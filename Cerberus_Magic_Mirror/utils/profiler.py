@@ -0,0 +1,149 @@
+# Cerberus Magic Mirror - Stage Profiler Utility
+# Author: Sudeepa Wanigarathna
+
+import time
+from collections import deque
+import numpy as np
+import config
+from utils.logger import logger
+
+class _NullStage:
+    """Shared do-nothing context manager used while profiling is off."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NULL_STAGE = _NullStage()
+
+class _Stage:
+    """Times one `with` block and records it on exit."""
+
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profiler.record(self.name, time.perf_counter() - self.start)
+        return False
+
+class StageProfiler:
+    """
+    Rolling per-stage timings for the frame pipeline.
+
+    Usage:
+        with profiler.stage("cloak.morphology"):
+            mask = cv2.morphologyEx(...)
+
+    While disabled, stage() returns a shared no-op context manager, so
+    instrumented code costs one attribute check per stage.
+    """
+
+    def __init__(self, enabled=None, window=None):
+        self.enabled = config.PROFILE_STAGES if enabled is None else enabled
+        self.window = window or config.PROFILE_WINDOW
+        self.samples = {}
+        self.last_summary_time = time.time()
+
+        # On-screen breakdown is refreshed a few times per second, not per frame
+        self.display_summary = []
+        self.display_summary_time = 0
+
+    def set_enabled(self, enabled):
+        """Turn profiling on or off; turning it on starts fresh statistics."""
+        if enabled and not self.enabled:
+            self.reset()
+        self.enabled = enabled
+
+    def reset(self):
+        """Discard all collected samples."""
+        self.samples.clear()
+        self.last_summary_time = time.time()
+
+    def stage(self, name):
+        """Return a context manager timing the named stage."""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def record(self, name, duration):
+        """Add a duration in seconds for a stage."""
+        samples = self.samples.get(name)
+        if samples is None:
+            samples = self.samples[name] = deque(maxlen=self.window)
+        samples.append(duration)
+
+    def get_summary(self):
+        """
+        Get statistics over the rolling window.
+
+        Returns:
+            list: (stage, mean_ms, p50_ms, p95_ms, max_ms) tuples in first-seen order
+        """
+        summary = []
+        for name, samples in self.samples.items():
+            if not samples:
+                continue
+            values = np.fromiter(samples, dtype=np.float64, count=len(samples)) * 1000
+            p50, p95 = np.percentile(values, [50, 95])
+            summary.append((name, float(values.mean()), float(p50), float(p95), float(values.max())))
+        return summary
+
+    def get_histogram(self, name, bins=10):
+        """
+        Histogram of a stage's recent durations.
+
+        Returns:
+            tuple: (counts, bin_edges_ms) or None if the stage has no samples
+        """
+        samples = self.samples.get(name)
+        if not samples:
+            return None
+        return np.histogram(np.fromiter(samples, dtype=np.float64) * 1000, bins=bins)
+
+    def log_summary_if_due(self):
+        """Write a summary to the log every config.PROFILE_LOG_INTERVAL seconds."""
+        if not self.enabled:
+            return
+
+        if time.time() - self.last_summary_time >= config.PROFILE_LOG_INTERVAL:
+            self.log_summary()
+
+    def log_summary(self):
+        """Write the current per-stage statistics to the log."""
+        self.last_summary_time = time.time()
+        summary = self.get_summary()
+        if summary:
+            logger.info("Stage timings (mean / p50 / p95 / max ms):")
+            for name, mean, p50, p95, peak in summary:
+                logger.info(f"  {name:<24} {mean:6.2f} / {p50:6.2f} / {p95:6.2f} / {peak:6.2f}")
+
+    def draw(self, frame, position, draw_text):
+        """
+        Draw an on-screen breakdown (mean ms per stage).
+
+        Args:
+            frame: Frame to draw on
+            position: (x, y) of the first line
+            draw_text: Callable(frame, text, position) used for each line
+        """
+        now = time.time()
+        if now - self.display_summary_time >= 0.5:
+            self.display_summary = self.get_summary()
+            self.display_summary_time = now
+
+        x, y = position
+        for name, mean, _, p95, _ in self.display_summary:
+            draw_text(frame, f"{name}: {mean:.1f}ms (p95 {p95:.1f})", (x, y))
+            y += 20
+
+# Global profiler instance
+profiler = StageProfiler()
@@ -3,19 +3,39 @@
 
 import cv2
 import os
+import threading
 import time
+from collections import deque
 from datetime import datetime
 import config
 
+DROP_POLICIES = ("block", "drop_oldest", "drop_newest")
+
 class VideoRecorder:
-    """Handles video recording functionality."""
+    """
+    Handles video recording functionality.
+    
+    Frames are encoded on a background thread fed by a bounded queue so
+    that cv2.VideoWriter.write never runs on the render loop.
+    """
     
-    def __init__(self):
+    def __init__(self, queue_size=None, drop_policy=None):
         self.is_recording = False
         self.video_writer = None
         self.output_filename = None
         self.start_time = None
         self.frame_count = 0
+        self.dropped_frames = 0
+        
+        # Encoder queue
+        self.queue_size = queue_size or config.RECORDING_QUEUE_SIZE
+        self.drop_policy = drop_policy or config.RECORDING_DROP_POLICY
+        if self.drop_policy not in DROP_POLICIES:
+            raise ValueError(f"Unknown recording drop policy: {self.drop_policy}")
+        self.frame_queue = deque()
+        self.queue_changed = threading.Condition()
+        self.encoder_thread = None
+        self.stop_requested = False
         
         # Ensure recording directory exists
         os.makedirs(config.RECORDING_DIR, exist_ok=True)
@@ -61,13 +81,35 @@ class VideoRecorder:
         self.is_recording = True
         self.start_time = time.time()
         self.frame_count = 0
+        self.dropped_frames = 0
+        self.frame_queue.clear()
+        self.stop_requested = False
+        
+        self.encoder_thread = threading.Thread(target=self._encoder_loop, name="EncoderThread", daemon=True)
+        self.encoder_thread.start()
         
         print(f"📹 Recording started: {self.output_filename}")
         return True
     
+    def _encoder_loop(self):
+        """Encode queued frames until stopped and the queue is drained."""
+        while True:
+            with self.queue_changed:
+                self.queue_changed.wait_for(lambda: self.frame_queue or self.stop_requested)
+                if not self.frame_queue:
+                    break
+                frame, _ = self.frame_queue[0]
+            
+            self.video_writer.write(frame)
+            
+            with self.queue_changed:
+                self.frame_queue.popleft()
+                self.frame_count += 1
+                self.queue_changed.notify_all()
+    
     def stop_recording(self):
         """
-        Stop recording and save the video file.
+        Stop recording, flush queued frames and save the video file.
         
         Returns:
             tuple: (success, filename, duration, frame_count)
@@ -79,6 +121,13 @@ class VideoRecorder:
         # Calculate duration
         duration = time.time() - self.start_time
         
+        # Let the encoder drain the queue, then join it
+        with self.queue_changed:
+            self.stop_requested = True
+            self.queue_changed.notify_all()
+        self.encoder_thread.join()
+        self.encoder_thread = None
+        
         # Release video writer
         if self.video_writer:
             self.video_writer.release()
@@ -86,33 +135,55 @@ class VideoRecorder:
         self.is_recording = False
         filename = self.output_filename
         frame_count = self.frame_count
+        dropped_frames = self.dropped_frames
         
         # Reset state
         self.video_writer = None
         self.output_filename = None
         self.start_time = None
         self.frame_count = 0
+        self.dropped_frames = 0
         
         print(f"✅ Recording stopped: {filename}")
-        print(f"   Duration: {duration:.1f}s, Frames: {frame_count}")
+        print(f"   Duration: {duration:.1f}s, Frames: {frame_count}, Dropped: {dropped_frames}")
         
         return True, filename, duration, frame_count
     
     def write_frame(self, frame):
         """
-        Write a frame to the video file.
+        Queue a frame for encoding.
+        
+        The frame is copied, so the caller may keep drawing into its buffer.
+        When the queue is full the configured drop policy applies: "block"
+        waits for the encoder, "drop_oldest" discards the oldest queued frame
+        and "drop_newest" discards this frame.
         
         Args:
             frame: Frame to write (numpy array)
             
         Returns:
-            bool: True if frame written successfully, False otherwise
+            bool: True if frame was queued, False otherwise
         """
         if not self.is_recording or self.video_writer is None:
             return False
         
-        self.video_writer.write(frame)
-        self.frame_count += 1
+        with self.queue_changed:
+            if len(self.frame_queue) >= self.queue_size:
+                if self.drop_policy == "block":
+                    self.queue_changed.wait_for(lambda: len(self.frame_queue) < self.queue_size)
+                elif self.drop_policy == "drop_newest":
+                    self.dropped_frames += 1
+                    return False
+                elif len(self.frame_queue) > 1:
+                    # Never drop the head; the encoder may be writing it
+                    del self.frame_queue[1]
+                    self.dropped_frames += 1
+                else:
+                    self.dropped_frames += 1
+                    return False
+            
+            self.frame_queue.append((frame.copy(), time.time()))
+            self.queue_changed.notify_all()
         return True
     
     def get_recording_status(self):
@@ -127,15 +198,27 @@ class VideoRecorder:
                 'is_recording': False,
                 'filename': None,
                 'duration': 0,
-                'frame_count': 0
+                'frame_count': 0,
+                'queue_depth': 0,
+                'encoder_lag': 0,
+                'dropped_frames': 0
             }
         
-        duration = time.time() - self.start_time
+        now = time.time()
+        duration = now - self.start_time
+        with self.queue_changed:
+            queue_depth = len(self.frame_queue)
+            # Lag: how long the oldest queued frame has been waiting
+            encoder_lag = now - self.frame_queue[0][1] if self.frame_queue else 0
+        
         return {
             'is_recording': True,
             'filename': self.output_filename,
             'duration': duration,
-            'frame_count': self.frame_count
+            'frame_count': self.frame_count,
+            'queue_depth': queue_depth,
+            'encoder_lag': encoder_lag,
+            'dropped_frames': self.dropped_frames
         }
     
     def cleanup(self):
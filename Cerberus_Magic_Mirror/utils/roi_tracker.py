@@ -0,0 +1,80 @@
+# Cerberus Magic Mirror - Region of Interest Tracking Utility
+# Author: Sudeepa Wanigarathna
+
+import cv2
+import config
+
+class RoiTracker:
+    """
+    Tracks the region of the frame an effect needs to process.
+
+    After each frame the tracker is given the pixels the effect still
+    depends on and keeps their bounding box plus a safety margin as the
+    next frame's region. The whole frame is scanned while nothing is
+    tracked, every `rescan_interval` frames (to pick up objects that
+    appear elsewhere) and whenever the detection reaches the edge of the
+    region, i.e. the object is moving out of it.
+
+    Regions are (x0, y0, x1, y1) with exclusive x1/y1.
+    """
+
+    def __init__(self, margin=None, rescan_interval=None, enabled=None):
+        self.margin = config.CLOAK_ROI_MARGIN if margin is None else margin
+        self.rescan_interval = rescan_interval or config.CLOAK_ROI_RESCAN_INTERVAL
+        self.enabled = config.CLOAK_ROI_TRACKING if enabled is None else enabled
+        self.roi = None
+        self.frames_since_scan = 0
+        self.needs_scan = True
+        self.full_scans = 0
+
+    def reset(self):
+        """Forget the tracked region; the next frame is scanned in full."""
+        self.roi = None
+        self.needs_scan = True
+
+    def next_roi(self, frame_shape):
+        """
+        Region to process for the coming frame.
+
+        Returns:
+            tuple: (x0, y0, x1, y1)
+        """
+        h, w = frame_shape[:2]
+        if (not self.enabled or self.roi is None or self.needs_scan
+                or self.frames_since_scan >= self.rescan_interval):
+            self.needs_scan = False
+            self.frames_since_scan = 0
+            self.full_scans += 1
+            return (0, 0, w, h)
+
+        self.frames_since_scan += 1
+        return self.roi
+
+    def update(self, roi, support, detection, frame_shape):
+        """
+        Set the next region from this frame's results.
+
+        Args:
+            roi: Region that was processed this frame
+            support: uint8 crop of the pixels still needed next frame
+            detection: uint8 crop of this frame's raw detection
+            frame_shape: Full frame shape
+        """
+        h, w = frame_shape[:2]
+        x0, y0, x1, y1 = roi
+
+        # Detection touching an inner edge of the region: it is leaving the ROI
+        dx, dy, dw, dh = cv2.boundingRect(detection)
+        if dw and dh and ((dx == 0 and x0 > 0) or (dy == 0 and y0 > 0) or
+                          (dx + dw == x1 - x0 and x1 < w) or (dy + dh == y1 - y0 and y1 < h)):
+            self.needs_scan = True
+
+        sx, sy, sw, sh = cv2.boundingRect(support)
+        if not (sw and sh):
+            self.roi = None
+            return
+
+        m = self.margin
+        self.roi = (max(0, x0 + sx - m), max(0, y0 + sy - m),
+                    min(w, x0 + sx + sw + m), min(h, y0 + sy + sh + m))
+
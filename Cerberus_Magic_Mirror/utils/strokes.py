@@ -0,0 +1,421 @@
+# Cerberus Magic Mirror - Paint Stroke Store Utility
+# Author: Sudeepa Wanigarathna
+
+import cv2
+import numpy as np
+import config
+
+class Stroke:
+    """One brush stroke: a polyline with a colour and width."""
+
+    __slots__ = ('id', 'color', 'width', 'points', 'count', 'bbox', 'cells')
+
+    def __init__(self, stroke_id, color, width, capacity=32):
+        self.id = stroke_id
+        self.color = tuple(int(c) for c in color)
+        self.width = int(width)
+        self.points = np.empty((capacity, 2), dtype=np.int32)
+        self.count = 0
+        self.bbox = None  # (x0, y0, x1, y1) of the painted pixels, exclusive x1/y1
+        self.cells = set()  # Grid cells the stroke is indexed under
+
+    @property
+    def coords(self):
+        """The stroke's points as an (N, 2) int32 array."""
+        return self.points[:self.count]
+
+    def append(self, point):
+        """Add a point, growing the array geometrically."""
+        if self.count == len(self.points):
+            grown = np.empty((len(self.points) * 2, 2), dtype=np.int32)
+            grown[:self.count] = self.points[:self.count]
+            self.points = grown
+        x, y = point
+        self.points[self.count] = (x, y)
+        self.count += 1
+
+        pad = self.width // 2 + 2
+        rect = (x - pad, y - pad, x + pad + 1, y + pad + 1)
+        self.bbox = rect if self.bbox is None else union_rect(self.bbox, rect)
+
+    def set_points(self, points):
+        """Replace the points with an (N, 2) array in one step."""
+        self.points = np.array(points, dtype=np.int32).reshape(-1, 2)
+        self.count = len(self.points)
+        pad = self.width // 2 + 2
+        x0, y0 = self.points.min(axis=0).tolist()
+        x1, y1 = self.points.max(axis=0).tolist()
+        self.bbox = (x0 - pad, y0 - pad, x1 + pad + 1, y1 + pad + 1)
+
+    def draw(self, canvas, offset=(0, 0), coverage=None):
+        """
+        Rasterize the stroke, with coordinates shifted by -offset.
+
+        Args:
+            canvas: BGR image to draw on
+            offset: (x, y) of the canvas within the full image
+            coverage: Optional single-channel mask to draw the stroke's alpha on
+        """
+        if self.count < 2:
+            return
+        points = [self.coords - np.array(offset, dtype=np.int32)]
+        cv2.polylines(canvas, points, False, self.color, self.width, cv2.LINE_AA)
+        if coverage is not None:
+            cv2.polylines(coverage, points, False, 255, self.width, cv2.LINE_AA)
+
+def union_rect(a, b):
+    """Smallest rectangle containing both (x0, y0, x1, y1) rectangles."""
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+class StrokeStore:
+    """
+    Retained paint strokes with undo/redo and a spatial index.
+
+    Strokes keep their points in growable int32 arrays. A uniform grid
+    maps each cell to the strokes passing through it, so hit tests and
+    region redraws only look at strokes near the point or region, no
+    matter how many strokes there are. Every change (drawing a stroke,
+    erasing strokes) is an undoable action; undo and redo report the
+    rectangle that needs re-rasterizing, and render() redraws just that
+    rectangle from the strokes overlapping it, in drawing order.
+    """
+
+    def __init__(self, cell_size=None):
+        self.cell_size = cell_size or config.PAINT_STROKE_GRID_CELL
+        self.strokes = {}  # id -> visible Stroke (ids increase in drawing order)
+        self.grid = {}  # (cx, cy) -> set of stroke ids
+        self.undo_stack = []  # ('add' | 'erase', [strokes])
+        self.redo_stack = []
+        self.next_id = 0
+        self.version = 0  # Bumped on every change
+
+        # Checkpoint log state (see save_checkpoint)
+        self.logged = {}  # id -> point count of every stroke in the log
+        self.logged_points = 0
+        self.logged_hidden = []
+        self.log_valid = False  # False: the next save rewrites the log
+
+    def reset(self):
+        """Forget all strokes and the undo history."""
+        self.strokes.clear()
+        self.grid.clear()
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.version += 1
+
+    def __len__(self):
+        return len(self.strokes)
+
+    def _cells(self, rect):
+        """Grid cells overlapping a rectangle."""
+        size = self.cell_size
+        x0, y0, x1, y1 = rect
+        return [(cx, cy)
+                for cy in range(y0 // size, (y1 - 1) // size + 1)
+                for cx in range(x0 // size, (x1 - 1) // size + 1)]
+
+    def _index(self, stroke, rect):
+        """Register a stroke under the cells a rectangle covers."""
+        for cell in self._cells(rect):
+            if cell not in stroke.cells:
+                stroke.cells.add(cell)
+                self.grid.setdefault(cell, set()).add(stroke.id)
+
+    def _index_all(self, stroke):
+        """Register every segment of a stroke at once (used when loading)."""
+        pts = stroke.coords
+        a, b = (pts[:-1], pts[1:]) if len(pts) > 1 else (pts, pts)
+        pad = stroke.width // 2 + 2
+        size = self.cell_size
+        # Cell range per segment; most segments share a range with their neighbours
+        ranges = np.concatenate([(np.minimum(a, b) - pad) // size,
+                                 (np.maximum(a, b) + pad) // size], axis=1)
+        for cx0, cy0, cx1, cy1 in set(map(tuple, ranges.tolist())):
+            for cy in range(cy0, cy1 + 1):
+                for cx in range(cx0, cx1 + 1):
+                    stroke.cells.add((cx, cy))
+        for cell in stroke.cells:
+            self.grid.setdefault(cell, set()).add(stroke.id)
+
+    def _show(self, strokes):
+        """Make strokes visible and index them."""
+        for stroke in strokes:
+            self.strokes[stroke.id] = stroke
+            for cell in stroke.cells:
+                self.grid.setdefault(cell, set()).add(stroke.id)
+
+    def _hide(self, strokes):
+        """Remove strokes from the visible set and the index."""
+        for stroke in strokes:
+            del self.strokes[stroke.id]
+            for cell in stroke.cells:
+                ids = self.grid[cell]
+                ids.discard(stroke.id)
+                if not ids:
+                    del self.grid[cell]
+
+    def _bounds(self, strokes):
+        """Rectangle covering the painted pixels of strokes."""
+        rect = None
+        for stroke in strokes:
+            if stroke.bbox is not None:
+                rect = stroke.bbox if rect is None else union_rect(rect, stroke.bbox)
+        return rect
+
+    def begin(self, point, color, width):
+        """
+        Start a stroke at a point.
+
+        Returns:
+            Stroke: The new stroke, to pass to extend() and end()
+        """
+        stroke = Stroke(self.next_id, color, width)
+        self.next_id += 1
+        stroke.append(point)
+        self.strokes[stroke.id] = stroke
+        self._index(stroke, stroke.bbox)
+        # The redo history survives until the stroke paints something
+        # (see extend()), so a tap that end() drops does not discard it
+        self.undo_stack.append(('add', [stroke]))
+        self.version += 1
+        return stroke
+
+    def extend(self, stroke, point):
+        """Add a point to a stroke and index the new segment."""
+        x0, y0 = stroke.points[stroke.count - 1].tolist()
+        stroke.append(point)
+        x1, y1 = point
+        pad = stroke.width // 2 + 2
+        self._index(stroke, (min(x0, x1) - pad, min(y0, y1) - pad,
+                             max(x0, x1) + pad + 1, max(y0, y1) + pad + 1))
+        if stroke.count == 2:
+            self.redo_stack.clear()
+        self.version += 1
+
+    def end(self, stroke):
+        """Finish a stroke; a single point paints nothing and is dropped."""
+        if stroke.count < 2 and stroke.id in self.strokes:
+            self._hide([stroke])
+            if self.undo_stack and self.undo_stack[-1][1] == [stroke]:
+                self.undo_stack.pop()
+            self.version += 1
+
+    def hit_test(self, point, radius):
+        """
+        Strokes passing within radius of a point.
+
+        Returns:
+            list: Hit strokes in drawing order
+        """
+        x, y = point
+        r = int(np.ceil(radius))
+        candidates = set()
+        for cell in self._cells((x - r, y - r, x + r + 1, y + r + 1)):
+            candidates.update(self.grid.get(cell, ()))
+
+        p = np.array(point, dtype=np.float32)
+        hits = []
+        for stroke_id in sorted(candidates):
+            stroke = self.strokes[stroke_id]
+            pts = stroke.coords.astype(np.float32)
+            reach = radius + stroke.width / 2
+            if len(pts) == 1:
+                dist = np.hypot(*(pts[0] - p))
+            else:
+                # Distance to the closest segment
+                a, ab = pts[:-1], pts[1:] - pts[:-1]
+                length_sq = np.maximum((ab * ab).sum(axis=1), 1e-6)
+                t = np.clip(((p - a) * ab).sum(axis=1) / length_sq, 0, 1)
+                dist = np.hypot(*(a + ab * t[:, None] - p).T).min()
+            if dist <= reach:
+                hits.append(stroke)
+        return hits
+
+    def erase(self, strokes, merge=False):
+        """
+        Remove strokes (undoable).
+
+        Args:
+            strokes: Strokes to remove
+            merge: Add them to the previous erase action, so one continuous
+                eraser gesture is undone in one step
+
+        Returns:
+            tuple: Rectangle to re-rasterize, or None if nothing was removed
+        """
+        strokes = [s for s in strokes if s.id in self.strokes]
+        if not strokes:
+            return None
+        self._hide(strokes)
+        if merge and self.undo_stack and self.undo_stack[-1][0] == 'erase':
+            self.undo_stack[-1][1].extend(strokes)
+        else:
+            self.undo_stack.append(('erase', strokes))
+        self.redo_stack.clear()
+        self.version += 1
+        return self._bounds(strokes)
+
+    def clear(self):
+        """Erase every stroke (undoable)."""
+        return self.erase(list(self.strokes.values()))
+
+    def undo(self):
+        """
+        Revert the last action.
+
+        Returns:
+            tuple: Rectangle to re-rasterize, or None if there was nothing to undo
+        """
+        if not self.undo_stack:
+            return None
+        action, strokes = self.undo_stack.pop()
+        if action == 'add':
+            self._hide(strokes)
+        else:
+            self._show(strokes)
+        self.redo_stack.append((action, strokes))
+        self.version += 1
+        return self._bounds(strokes)
+
+    def redo(self):
+        """
+        Re-apply the last undone action.
+
+        Returns:
+            tuple: Rectangle to re-rasterize, or None if there was nothing to redo
+        """
+        if not self.redo_stack:
+            return None
+        action, strokes = self.redo_stack.pop()
+        if action == 'add':
+            self._show(strokes)
+        else:
+            self._hide(strokes)
+        self.undo_stack.append((action, strokes))
+        self.version += 1
+        return self._bounds(strokes)
+
+    def render(self, canvas, rect=None, coverage=None):
+        """
+        Redraw a region of the canvas from the visible strokes.
+
+        Args:
+            canvas: BGR canvas, cleared to black inside the region first
+            rect: (x0, y0, x1, y1) region; defaults to the whole canvas
+            coverage: Optional coverage mask, redrawn alongside the canvas
+
+        Returns:
+            tuple: The region actually redrawn (clipped), or None if empty
+        """
+        h, w = canvas.shape[:2]
+        x0, y0, x1, y1 = rect if rect is not None else (0, 0, w, h)
+        x0, y0, x1, y1 = max(0, x0), max(0, y0), min(w, x1), min(h, y1)
+        if x0 >= x1 or y0 >= y1:
+            return None
+
+        region = canvas[y0:y1, x0:x1]
+        region.fill(0)
+        coverage_region = None
+        if coverage is not None:
+            coverage_region = coverage[y0:y1, x0:x1]
+            coverage_region.fill(0)
+        ids = set()
+        for cell in self._cells((x0, y0, x1, y1)):
+            ids.update(self.grid.get(cell, ()))
+        for stroke_id in sorted(ids):
+            self.strokes[stroke_id].draw(region, (x0, y0), coverage_region)
+        return (x0, y0, x1, y1)
+
+    def _pack(self, strokes):
+        """Points and (id, count, width, b, g, r) rows for strokes, in order."""
+        points = (np.concatenate([s.coords for s in strokes])
+                  if strokes else np.empty((0, 2), dtype=np.int32))
+        meta = np.array([(s.id, s.count, s.width) + s.color for s in strokes],
+                        dtype=np.int32).reshape(-1, 6)
+        return points, meta
+
+    def save_checkpoint(self, store, name, before=None):
+        """
+        Save the visible strokes incrementally (undo history is not kept).
+
+        The checkpoint is a stroke log: all points, one (id, count, width,
+        b, g, r) row per stroke, and the ids of logged strokes that are
+        currently hidden (erased or undone). Strokes are appended to the
+        log once, when first saved, and erasing only rewrites the hidden
+        list, so a save costs what changed rather than the whole drawing.
+        The log is rewritten from the visible strokes when hidden ones make
+        up more than half of its points.
+
+        Args:
+            store: CheckpointStore or CheckpointWriter
+            name: Mode checkpoint name
+            before: Only log strokes with smaller ids (e.g. the stroke being
+                drawn, which is still growing)
+        """
+        limit = self.next_id if before is None else before
+        hidden = sorted(i for i in self.logged if i not in self.strokes)
+        hidden_points = sum(self.logged[i] for i in hidden)
+
+        if not self.log_valid or hidden_points * 2 > self.logged_points:
+            strokes = [self.strokes[i] for i in sorted(self.strokes) if i < limit]
+            points, meta = self._pack(strokes)
+            store.save_array(name, 'stroke_points', points)
+            store.save_array(name, 'stroke_meta', meta)
+            self.logged = {s.id: s.count for s in strokes}
+            self.logged_points = len(points)
+            self.log_valid = True
+            hidden = []
+        else:
+            strokes = [self.strokes[i] for i in sorted(self.strokes)
+                       if i < limit and i not in self.logged]
+            if strokes:
+                points, meta = self._pack(strokes)
+                # Points first: rows in the meta log must always have their points
+                if not (store.append_array(name, 'stroke_points', points)
+                        and store.append_array(name, 'stroke_meta', meta)):
+                    self.log_valid = False
+                    self.save_checkpoint(store, name, before)
+                    return
+                self.logged.update((s.id, s.count) for s in strokes)
+                self.logged_points += len(points)
+
+        if hidden != self.logged_hidden:
+            store.save_array(name, 'stroke_hidden', np.array(hidden, dtype=np.int32))
+            self.logged_hidden = hidden
+
+    def restore_checkpoint(self, store, name):
+        """
+        Replace the strokes with ones saved by save_checkpoint().
+
+        Returns:
+            bool: True if strokes were loaded
+        """
+        points = store.load_array(name, 'stroke_points')
+        meta = store.load_array(name, 'stroke_meta')
+        if points is None or meta is None:
+            return False
+
+        self.reset()
+        hidden = store.load_array(name, 'stroke_hidden')
+        hidden = [] if hidden is None else sorted(hidden.tolist())
+        hidden_ids = set(hidden)
+
+        rows = meta.tolist()
+        starts = np.concatenate(([0], np.cumsum(meta[:, 1]))).tolist()
+        for (stroke_id, count, width, b, g, r), start in zip(rows, starts):
+            if start + count > len(points):
+                break  # Rows whose points were never written
+            if stroke_id in hidden_ids:
+                continue
+            stroke = Stroke(stroke_id, (b, g, r), width)
+            stroke.set_points(points[start:start + count])
+            self.strokes[stroke.id] = stroke
+            self._index_all(stroke)
+
+        self.next_id = max((row[0] for row in rows), default=-1) + 1
+        self.logged = {row[0]: row[1] for row in rows}
+        self.logged_points = starts[-1]
+        self.logged_hidden = hidden
+        # Appending needs a log with exactly the points its rows describe
+        self.log_valid = len(points) == starts[-1]
+        return True
@@ -0,0 +1,143 @@
+# Cerberus Magic Mirror - Text Sprite Cache Utility
+# Author: Sudeepa Wanigarathna
+
+from collections import OrderedDict
+import cv2
+import numpy as np
+import config
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+class TextSprite:
+    """
+    A pre-rasterized outlined label.
+
+    Stored premultiplied in 8.8 fixed point: blending is
+    dst = (dst * inv_alpha + color + 128) >> 8, with inv_alpha in 0..256.
+    """
+
+    __slots__ = ('color', 'inv_alpha', 'offset_x', 'offset_y', 'height', 'width')
+
+    def __init__(self, color, inv_alpha, offset_x, offset_y):
+        self.color = color
+        self.inv_alpha = inv_alpha
+        self.offset_x = offset_x
+        self.offset_y = offset_y
+        self.height, self.width = inv_alpha.shape[:2]
+
+class TextSpriteCache:
+    """
+    Draws outlined text from an LRU cache of rasterized sprites.
+
+    Two anti-aliased cv2.putText calls per label per frame become one small
+    blend into the label's region. Rasterizing a sprite costs far more than
+    drawing the text directly, so a label is drawn with cv2.putText the
+    first time it is seen and only turned into a sprite when it comes back.
+    Labels whose text changes every frame (counters, percentages) thus
+    never pay for a sprite; callers that know a label is dynamic can also
+    pass cache=False to skip the bookkeeping entirely.
+    """
+
+    def __init__(self, max_size=None):
+        self.max_size = max_size or config.TEXT_SPRITE_CACHE_SIZE
+        self.sprites = OrderedDict()
+        self.seen = OrderedDict()  # Keys drawn once, without a sprite yet
+        self.hits = 0
+        self.misses = 0
+
+    def draw(self, frame, text, position, scale, color, thickness, outline_color=(0, 0, 0), outline_thickness=None,
+             cache=True):
+        """
+        Draw outlined text, same placement as cv2.putText.
+
+        Args:
+            frame: BGR frame to draw on (modified in place)
+            text: Label text
+            position: (x, y) of the baseline start, as for cv2.putText
+            scale: Font scale
+            color: BGR text colour
+            thickness: Text stroke thickness
+            outline_color: BGR outline colour
+            outline_thickness: Outline stroke thickness (defaults to thickness + 2)
+            cache: False for text that changes every frame; always drawn directly
+        """
+        if outline_thickness is None:
+            outline_thickness = thickness + 2
+
+        key = (text, float(scale), int(thickness), tuple(int(c) for c in color),
+               tuple(int(c) for c in outline_color), int(outline_thickness))
+        sprite = self.sprites.get(key) if cache else None
+        if sprite is None:
+            self.misses += 1
+            if not cache or key not in self.seen:
+                if cache:
+                    self.seen[key] = True
+                    if len(self.seen) > self.max_size:
+                        self.seen.popitem(last=False)
+                self._put_text(frame, position, *key)
+                return
+            del self.seen[key]
+            sprite = self._render(*key)
+            self.sprites[key] = sprite
+            if len(self.sprites) > self.max_size:
+                self.sprites.popitem(last=False)
+        else:
+            self.hits += 1
+            self.sprites.move_to_end(key)
+
+        self._blit(frame, sprite, int(position[0]), int(position[1]))
+
+    @staticmethod
+    def _put_text(frame, position, text, scale, thickness, color, outline_color, outline_thickness):
+        """Draw a label straight onto the frame (outline, then fill)."""
+        position = (int(position[0]), int(position[1]))
+        cv2.putText(frame, text, position, FONT, scale, outline_color, outline_thickness, cv2.LINE_AA)
+        cv2.putText(frame, text, position, FONT, scale, color, thickness, cv2.LINE_AA)
+
+    def _render(self, text, scale, thickness, color, outline_color, outline_thickness):
+        """Rasterize a label into premultiplied colour and inverse alpha."""
+        (text_w, text_h), baseline = cv2.getTextSize(text, FONT, scale, max(thickness, outline_thickness))
+        pad = max(thickness, outline_thickness) // 2 + 2
+        h = text_h + baseline + 2 * pad
+        w = text_w + 2 * pad
+        origin = (pad, pad + text_h)
+
+        # Coverage of each pass, as putText would blend it into the frame
+        outline = np.zeros((h, w), dtype=np.uint8)
+        cv2.putText(outline, text, origin, FONT, scale, 255, outline_thickness, cv2.LINE_AA)
+        fill = np.zeros((h, w), dtype=np.uint8)
+        cv2.putText(fill, text, origin, FONT, scale, 255, thickness, cv2.LINE_AA)
+
+        a_outline = outline.astype(np.float32)[..., None] / 255.0
+        a_fill = fill.astype(np.float32)[..., None] / 255.0
+        alpha = 1.0 - (1.0 - a_outline) * (1.0 - a_fill)
+        premultiplied = (np.array(outline_color, np.float32) * a_outline * (1.0 - a_fill)
+                         + np.array(color, np.float32) * a_fill)
+
+        inv_alpha = 256 - np.rint(alpha * 256).astype(np.uint16)
+        # Keep dst * inv_alpha + color within 255 * 256 so uint16 cannot overflow
+        sprite_color = np.minimum(np.rint(premultiplied * 256), 255 * (256 - inv_alpha)).astype(np.uint16)
+        inv_alpha = np.repeat(inv_alpha, 3, axis=2)
+        return TextSprite(sprite_color, inv_alpha, -pad, -(pad + text_h))
+
+    @staticmethod
+    def _blit(frame, sprite, x, y):
+        """Blend a sprite into the frame, clipped to the frame bounds."""
+        fh, fw = frame.shape[:2]
+        x1 = x + sprite.offset_x
+        y1 = y + sprite.offset_y
+        sx1, sy1 = max(0, -x1), max(0, -y1)
+        sx2 = min(sprite.width, fw - x1)
+        sy2 = min(sprite.height, fh - y1)
+        if sx1 >= sx2 or sy1 >= sy2:
+            return
+
+        roi = frame[y1 + sy1:y1 + sy2, x1 + sx1:x1 + sx2]
+        blended = roi * sprite.inv_alpha[sy1:sy2, sx1:sx2]
+        blended += sprite.color[sy1:sy2, sx1:sx2]
+        blended += 128
+        blended >>= 8
+        roi[:] = blended
+
+# Global text sprite cache instance
+text_cache = TextSpriteCache()